@@ -6,7 +6,6 @@ import win32service
 import win32event
 import servicemanager
 import socket
-import time
 import os
 import subprocess
 from datetime import datetime
@@ -15,8 +14,16 @@ from datetime import datetime
 MANAGE_FILE = r'C:\inetpub\wwwroot\net_sync\src\manage.py'
 # path to netsync log file
 LOG_FILE = r'C:\ProgramData\NetSync\netsync.log'
-# minutes to refresh
+# minutes to check if the scheduler process is alive
 TIMING = 1
+# seconds between checks for changes in syncs
+POLL = 5
+# syncs run in parallel by the scheduler
+WORKERS = 4
+# file whose creation stops the scheduler after the running syncs end
+STOP_FILE = r'C:\ProgramData\NetSync\netsync.stop'
+# seconds to wait for the running syncs before killing the scheduler
+STOP_TIMEOUT = 300
 
 # system constants
 LOG_PATH = os.path.dirname(LOG_FILE)
@@ -40,7 +47,11 @@ class AppServerSvc(win32serviceutil.ServiceFramework):
     def SvcStop(self):
         self.stop()
 
-        self.ReportServiceStatus(win32service.SERVICE_STOP_PENDING)
+        # the scheduler waits for the running syncs
+        self.ReportServiceStatus(
+            win32service.SERVICE_STOP_PENDING,
+            waitHint=STOP_TIMEOUT * 1000
+        )
         win32event.SetEvent(self.hWaitStop)
 
     def SvcDoRun(self):
@@ -77,34 +88,67 @@ class AppServerSvc(win32serviceutil.ServiceFramework):
 
         self.isrunning = False
 
+    def start_scheduler(self, logg):
+        """ Start the long-running sync scheduler process. """
+
+        return subprocess.Popen(
+            [
+                'python', MANAGE_FILE, 'sync_scheduler',
+                '--poll', str(POLL), '--workers', str(WORKERS),
+                '--stop-file', STOP_FILE, '--messages'
+            ],
+            stdout=logg,
+            stderr=logg
+        )
+
+    def stop_scheduler(self, scheduler, logg):
+        """
+        Ask the scheduler to stop (stop file) and wait for its running
+        syncs. Kill it if they don't end in STOP_TIMEOUT seconds.
+        """
+
+        with open(STOP_FILE, mode='w'):
+            pass
+
+        try:
+            scheduler.wait(timeout=STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logg.write('{} Scheduler killed after {} seconds.\n'.format(
+                datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                STOP_TIMEOUT
+            ))
+            scheduler.terminate()
+
     def main(self):
+        # ensure log folder
+        self.ensure_log_folder()
+
         # main process
-        while self.isrunning:
-            # ensure log folder
-            self.ensure_log_folder()
+        with open(LOG_FILE, mode='a+', encoding='utf-8') as logg:
+            scheduler = None
 
-            # main process
-            with open(LOG_FILE, mode='a+', encoding='utf-8') as logg:
+            while self.isrunning:
                 try:
-                    # logs cleaning
-                    cl = subprocess.check_call(
-                        ['python', MANAGE_FILE, 'clean_logs'],
-                        stdout=logg,
-                        shell=True
-                    )
-
-                    # run syncs
-                    p = subprocess.check_call(
-                        ['python', MANAGE_FILE, 'run_syncs'],
-                        stdout=logg,
-                        shell=True
-                    )
+                    # start scheduler or restart it if was ended
+                    if not scheduler or scheduler.poll() is not None:
+                        scheduler = self.start_scheduler(logg)
+
                 except Exception as error:
                     logg.write('{} Command Error: {}.\n'.format(
                         datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
                         str(error)
                     ))
-            time.sleep(TIMING * 60)
+                    logg.flush()
+
+                # wait for stop signal
+                win32event.WaitForSingleObject(
+                    self.hWaitStop,
+                    TIMING * 60 * 1000
+                )
+
+            # stop scheduler with service
+            if scheduler and scheduler.poll() is None:
+                self.stop_scheduler(scheduler, logg)
 
 
 if __name__ == '__main__':
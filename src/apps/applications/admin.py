@@ -45,20 +45,24 @@ class SyncsAdmin(admin.ModelAdmin):
     inlines = [SyncParamsInline, SyncProcessInline]
     fields = (
         'synchronize', 'origin', 'destiny', 'cron_expression', 'active',
+        'streaming', 'fingerprint_field', 'watermark_field', 'watermark',
         'status', 'get_last_run', 'get_next_run', 'needs_run'
     )
     list_display = (
         'synchronize', 'origin', 'destiny', 'is_valid', 'active', 'status',
         'get_last_run', 'get_next_run', 'needs_run'
     )
-    readonly_fields = ['get_last_run', 'get_next_run', 'needs_run', 'status']
+    readonly_fields = [
+        'get_last_run', 'get_next_run', 'needs_run', 'status', 'watermark'
+    ]
+    list_select_related = ['origin', 'destiny']
     autocomplete_fields = ['origin', 'destiny']
     list_filter = ['synchronize', 'origin', 'destiny', 'active', 'status', ]
     search_fields = [
         'synchronize', 'origin__application', 'destiny__application', 'status'
     ]
 
-    actions = ['execute', 'queue']
+    actions = ['execute', 'queue', 'clear_fingerprints']
 
     def queue(self, request, queryset):
 
@@ -76,7 +80,7 @@ class SyncsAdmin(admin.ModelAdmin):
 
         for sync in queryset:
             # execute and eval result
-            if not sync.run():
+            if not sync.run(force=True):
                correct = False
 
         if correct:
@@ -92,8 +96,21 @@ class SyncsAdmin(admin.ModelAdmin):
                 _('One or more tasks could not be executed.')
             )
 
+    def clear_fingerprints(self, request, queryset):
+
+        # next runs send all records
+        for sync in queryset:
+            sync.clear_fingerprints()
+
+        messages.add_message(
+            request,
+            messages.SUCCESS,
+            _('Fingerprints were cleared.')
+        )
+
     execute.short_description = _("Execute")
     queue.short_description = _("Queue")
+    clear_fingerprints.short_description = _("Clear fingerprints")
 
 
 @admin.register(models.SyncHistory)
@@ -101,7 +118,7 @@ class SyncHistoryAdmin(admin.ModelAdmin):
 
     readonly_fields = [
         "sync", "get_origin", "get_destiny", "start_time", "end_time", "ok",
-        "message"
+        "message", "stats"
     ]
     list_display = [
         "sync", "get_origin", "get_destiny", "start_time", "end_time", "ok"
@@ -23,7 +23,9 @@ class SyncParameterForm(ModelForm):
 class SyncProcessForm(ModelForm):
     class Meta:
         model = models.SyncProcess
-        fields = ('order', 'name', '_help', 'requirements', 'expression')
+        fields = (
+            'order', 'name', '_help', 'requirements', 'columnar', 'expression'
+        )
 
         widgets = {
             'expression': Textarea(),
@@ -2,6 +2,7 @@
 
 ### built-in ###
 from datetime import datetime
+import time
 
 ### django ###
 from django.core.management.base import BaseCommand #, CommandError
@@ -26,12 +27,30 @@ class Command(BaseCommand):
             action='store_true',
             help='Get info and warning messages (with result).'
         )
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Max rows to delete in each batch. '
+                'settings.LOG_AUTOCLEAN_BATCH_SIZE by default.'
+        )
+        parser.add_argument(
+            '-p',
+            '--pause',
+            type=float,
+            default=None,
+            help='Seconds to wait between batches. '
+                'settings.LOG_AUTOCLEAN_PAUSE by default.'
+        )
 
     def handle(self, *args, **kwargs):
         
         # if force ignore last error
         force = kwargs.get('force')
         messages = kwargs.get('messages')
+        batch_size = kwargs.get('batch_size')
+        pause = kwargs.get('pause')
         
         # inform start runs
         if messages:
@@ -41,11 +60,25 @@ class Command(BaseCommand):
 
         try:
             # execute and evaluate result
-            result = models.SyncHistory.delete_olds(force=force)
+            start = time.monotonic()
+            deleted = models.SyncHistory.delete_olds(
+                force=force,
+                batch_size=batch_size,
+                pause=pause
+            )
+            elapsed = time.monotonic() - start
 
             #if everything was correctly ended
-            if messages and result[0]:
-                self.stdout.write(self.style.SUCCESS(str(result)))
+            if messages and deleted:
+                self.stdout.write(self.style.SUCCESS(
+                    '{} - INFO - {} rows deleted in {:.2f}s ({:.0f} rows/s).'\
+                    .format(
+                        datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                        deleted,
+                        elapsed,
+                        deleted / elapsed if elapsed else deleted
+                    )
+                ))
 
             if messages:
                 self.stdout.write(
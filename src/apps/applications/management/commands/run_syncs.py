@@ -26,12 +26,20 @@ class Command(BaseCommand):
             action='store_true',
             help='Get info and warning messages (with errors).'
         )
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of syncs to run in parallel. 1 by default.'
+        )
 
     def handle(self, *args, **kwargs):
         
         # if force ignore last error
         force = kwargs.get('force')
         messages = kwargs.get('messages')
+        workers = kwargs.get('workers')
         
         # inform start runs
         if messages:
@@ -44,13 +52,14 @@ class Command(BaseCommand):
             if force:
                 # all active and not pending elements
                 syncs = models.Sync.objects.filter(active=True, status='0')
-                result = True
-                for sync in syncs:
-                    if not sync.run():
-                        result = False
+                result = models.Sync.run_all(
+                    syncs,
+                    workers=workers,
+                    force=True
+                )
             else:
                 # needs_run only
-                result = models.Sync.run_needs()
+                result = models.Sync.run_needs(workers=workers)
 
             #if everything was correctly ended
             if not result:
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+### built-in ###
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import heapq
+import os
+import signal
+import time
+
+### django ###
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils.timezone import now
+
+### own ###
+from apps.applications import models
+from utils import processors
+
+
+class Command(BaseCommand):
+    help = 'Long-running scheduler that runs syncs when they need to run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of syncs to run in parallel. 1 by default.'
+        )
+        parser.add_argument(
+            '-p',
+            '--poll',
+            type=float,
+            default=5,
+            help='Seconds between checks for changes in syncs. 5 by default.'
+        )
+        parser.add_argument(
+            '-c',
+            '--clean',
+            type=float,
+            default=60,
+            help='Minutes between logs cleanings. 60 by default.'
+        )
+        parser.add_argument(
+            '-s',
+            '--stop-file',
+            default=None,
+            help=(
+                'Path of a file whose creation stops the scheduler after the '
+                'running syncs end.'
+            )
+        )
+        parser.add_argument(
+            '-m',
+            '--messages',
+            action='store_true',
+            help='Get info and warning messages (with errors).'
+        )
+
+    def log(self, level: str, message: str, style=None):
+        """ Write a message with the format of the other commands. """
+
+        text = '{} - {} - {}'.format(
+            datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            level,
+            message
+        )
+        self.stdout.write(style(text) if style else text)
+
+    def interrupt(self, signum, frame):
+        """ Stop as KeyboardInterrupt does (SIGTERM, CTRL_BREAK). """
+
+        raise KeyboardInterrupt
+
+    @staticmethod
+    def stop_requested(stop_file: str) -> bool:
+        """ True if the stop file was created. """
+
+        return bool(stop_file) and os.path.exists(stop_file)
+
+    def get_signature(self):
+        """
+        Return a cheap snapshot of the syncs state. If it changes, the queue
+        must be scheduled again.
+        """
+
+        return tuple(models.Sync.objects.filter(active=True).order_by(
+            'id'
+        ).values_list('id', 'cron_expression', 'status', 'next_run_at'))
+
+    def schedule(self):
+        """ Build the queue with (next_run, sync_id) of all active syncs. """
+
+        queue = []
+        for sync in models.Sync.objects.filter(active=True):
+            # queued syncs run as soon as possible
+            if sync.status == '2':
+                queue.append((now(), sync.id))
+                continue
+
+            # running syncs will be scheduled when they end
+            if sync.status != '0':
+                continue
+
+            next_run = sync.get_next_run()
+            if next_run:
+                queue.append((next_run, sync.id))
+
+        heapq.heapify(queue)
+        return queue
+
+    def pop_due(self):
+        """ Pop and return the ids of all syncs that need to run now. """
+
+        due = []
+        current = now()
+        while self.queue and self.queue[0][0] <= current:
+            due.append(heapq.heappop(self.queue)[1])
+
+        return due
+
+    def collect(self, messages: bool = False) -> bool:
+        """
+        Remove the finished syncs from the running ones and inform their
+        results. Return True if any sync finished.
+        """
+
+        finished = [
+            sync_id for sync_id, future in self.running.items() \
+                if future.done()
+        ]
+
+        for sync_id in finished:
+            try:
+                ok = self.running.pop(sync_id).result()
+            except Exception as error:
+                self.log('ERROR', str(error), self.style.ERROR)
+                ok = False
+
+            if not ok:
+                self.log(
+                    'ERROR',
+                    f'Sync {sync_id} - See sync_history for more information.',
+                    self.style.ERROR
+                )
+            elif messages:
+                self.log(
+                    'INFO',
+                    f'OK - The sync {sync_id} has finished!',
+                    self.style.SUCCESS
+                )
+
+        if finished and messages:
+            self.log('INFO', 'Credentials {}'.format(models.Credential.cache))
+            self.log('INFO', 'Dates {}'.format(processors.parse_date_info()))
+
+        return bool(finished)
+
+    def clean(self, messages: bool = False):
+        """
+        Delete the old logs (SyncHistory.delete_olds) in the cleaner thread,
+        closing the db connections opened by the thread.
+        """
+
+        try:
+            deleted = models.SyncHistory.delete_olds()
+            if messages:
+                self.log('INFO', f'{deleted} old logs deleted.')
+        except Exception as error:
+            self.log('ERROR', str(error), self.style.ERROR)
+        finally:
+            connections.close_all()
+
+    def get_sleep(self, poll: float):
+        """ Seconds to sleep until the next sync or next poll. """
+
+        if not self.queue:
+            return poll
+
+        wait = (self.queue[0][0] - now()).total_seconds()
+        return max(0, min(poll, wait))
+
+    def handle(self, *args, **kwargs):
+
+        workers = kwargs.get('workers')
+        poll = kwargs.get('poll')
+        clean_every = kwargs.get('clean') * 60
+        messages = kwargs.get('messages')
+        stop_file = kwargs.get('stop_file')
+
+        if messages:
+            self.log('INFO', 'Starting sync scheduler...')
+
+        # graceful stop with signals or stop file
+        signal.signal(signal.SIGTERM, self.interrupt)
+        if hasattr(signal, 'SIGBREAK'):
+            signal.signal(signal.SIGBREAK, self.interrupt)
+        if self.stop_requested(stop_file):
+            os.remove(stop_file)
+
+        # syncs left running by a killed scheduler
+        reset = models.Sync.reset_running()
+        if reset:
+            self.log(
+                'WARNING',
+                f'{reset} syncs left running were set as pending.'
+            )
+
+        # compile processes once
+        compiled, errors = models.SyncProcess.precompile()
+        if messages:
+            self.log('INFO', f'{compiled} processes compiled.')
+
+        # their syncs will fail (and inform it) when they run
+        for error in errors:
+            self.log(
+                'ERROR',
+                'Process {} can\'t be compiled: {}'.format(
+                    error.get('process'),
+                    error.get('error')
+                ),
+                self.style.ERROR
+            )
+
+        self.queue = []
+        signature = None
+        last_clean = None
+
+        # running syncs (sync_id: future), the loop keeps polling while they
+        # run in the executor
+        self.running = {}
+        executor = models.Sync.get_executor(workers)
+
+        # logs cleaning runs in its own thread, the loop keeps polling while
+        # the old logs are deleted
+        cleaner = ThreadPoolExecutor(max_workers=1)
+        cleaning = None
+
+        try:
+            while not self.stop_requested(stop_file):
+                try:
+                    # discard unusable db connections in long-running process
+                    close_old_connections()
+
+                    # force schedule with new last runs
+                    if self.collect(messages):
+                        signature = None
+
+                    # schedule again only if there was changes
+                    current_signature = self.get_signature()
+                    if current_signature != signature:
+                        signature = current_signature
+                        self.queue = self.schedule()
+
+                    # submit due syncs that are not running
+                    due = [
+                        sync_id for sync_id in self.pop_due() \
+                            if sync_id not in self.running
+                    ]
+                    if due:
+                        for sync in models.Sync.objects.filter(
+                                pk__in=due, active=True):
+                            self.running[sync.id] = sync.submit(executor)
+
+                    # logs cleaning, if the previous one finished
+                    if (not cleaning or cleaning.done()) and (
+                            not last_clean or \
+                            time.monotonic() - last_clean >= clean_every):
+                        last_clean = time.monotonic()
+                        cleaning = cleaner.submit(self.clean, messages)
+
+                except Exception as error:
+                    self.log('ERROR', str(error), self.style.ERROR)
+
+                    # force schedule in next loop
+                    signature = None
+
+                time.sleep(self.get_sleep(poll))
+
+        except KeyboardInterrupt:
+            pass
+
+        if messages:
+            self.log('INFO', 'Waiting for running syncs...')
+
+        # running syncs end with their history
+        executor.shutdown(wait=True)
+        self.collect(messages)
+
+        # wait for a cleaning in progress
+        cleaner.shutdown(wait=True)
+
+        if self.stop_requested(stop_file):
+            os.remove(stop_file)
+
+        if messages:
+            self.log('INFO', 'Sync scheduler stopped.')
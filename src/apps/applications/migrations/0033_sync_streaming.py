@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0032_auto_20210304_1421'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sync',
+            name='streaming',
+            field=models.BooleanField(default=False, help_text='Send the source data to the target in chunks while it is being obtained. Processes are executed for each chunk.'),
+        ),
+    ]
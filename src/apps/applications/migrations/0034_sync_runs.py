@@ -0,0 +1,67 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:40
+
+import datetime as dt
+
+from django.db import migrations, models
+from django.utils.timezone import now
+
+import croniter
+
+
+def backfill_runs(apps, schema_editor):
+    """ Set the denormalized runs of each sync from its sync history. """
+
+    Sync = apps.get_model('applications', 'Sync')
+    SyncHistory = apps.get_model('applications', 'SyncHistory')
+
+    for sync in Sync.objects.all():
+        histories = SyncHistory.objects.filter(sync=sync).order_by('-pk')
+        last = histories.first()
+        finished = histories.exclude(end_time__isnull=True).first()
+
+        last_finished_at = finished.end_time if finished else None
+
+        try:
+            cron = croniter.croniter(
+                sync.cron_expression,
+                last_finished_at or now()
+            )
+            next_run_at = cron.get_next(dt.datetime)
+        except Exception:
+            next_run_at = None
+
+        Sync.objects.filter(pk=sync.pk).update(
+            last_started_at=last.start_time if last else None,
+            last_finished_at=last_finished_at,
+            next_run_at=next_run_at
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0033_sync_streaming'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sync',
+            name='last_finished_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sync',
+            name='last_started_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sync',
+            name='next_run_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='sync',
+            index=models.Index(fields=['active', 'status', 'next_run_at'], name='sync_needs_run_idx'),
+        ),
+        migrations.RunPython(backfill_runs, migrations.RunPython.noop),
+    ]
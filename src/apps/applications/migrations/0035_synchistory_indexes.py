@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0034_sync_runs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='synchistory',
+            index=models.Index(fields=['end_time'], name='synchistory_end_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synchistory',
+            index=models.Index(fields=['sync', 'start_time'], name='synchistory_sync_start_idx'),
+        ),
+    ]
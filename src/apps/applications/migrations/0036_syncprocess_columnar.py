@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0035_synchistory_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncprocess',
+            name='columnar',
+            field=models.BooleanField(default=False, help_text='The procedure receives and returns a pandas DataFrame instead of a list of dict.'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-18 15:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0036_syncprocess_columnar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sync',
+            name='fingerprint_field',
+            field=models.CharField(blank=True, help_text='Identity field of the records sent to the target (rget path, eg. "employeeCode"). If informed, only new or changed records are sent.', max_length=100, null=True),
+        ),
+        migrations.CreateModel(
+            name='SyncFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('digest', models.CharField(max_length=32)),
+                ('sync', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='applications.Sync')),
+            ],
+            options={
+                'unique_together': {('sync', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.28 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+def backfill_watermark(apps, schema_editor):
+    """ Start the watermark of each sync at its last successful run. """
+
+    Sync = apps.get_model('applications', 'Sync')
+    SyncHistory = apps.get_model('applications', 'SyncHistory')
+
+    for sync in Sync.objects.all():
+        history = SyncHistory.objects.filter(
+            sync=sync,
+            ok=True,
+            end_time__isnull=False
+        ).order_by('-pk').first()
+
+        if history:
+            Sync.objects.filter(pk=sync.pk).update(
+                watermark=history.start_time
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0037_sync_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sync',
+            name='watermark',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sync',
+            name='watermark_field',
+            field=models.CharField(blank=True, help_text='Timestamp field of the source records (rget path, eg. "modified"). Next runs get the records from the max value delivered. If empty, from the start of the last successful run.', max_length=100, null=True),
+        ),
+        migrations.RunPython(backfill_watermark, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0038_sync_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synchistory',
+            name='stats',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -2,12 +2,18 @@
 
 ### built-in ###
 import datetime as dt
+import hashlib
 import json
 import importlib
+import threading
+import time
 import traceback
+from collections import namedtuple
 
 ### django ###
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 # from django.db.models import Q
 from django.conf import settings
 from django.utils.timezone import now
@@ -16,13 +22,126 @@ from django.utils.translation import gettext as _
 from django.utils import timezone
 
 ### own ###
+from utils import api
+from utils import concurrency
 from utils import connectors
-from utils.processors import rgetattr
+from utils.connections import pool as connections_pool
+from utils.processors import get_accessor, parse_date, rgetattr
 
 ### third ###
 import croniter
 
 
+# keys of the registered params, missing ones can't be read
+REGISTERED_KEYS = frozenset(key for key, _ in settings.REGISTERED_PARAMS)
+
+
+class MissingParameter(AttributeError):
+    """ Raised when a connector reads a param the credential doesn't have. """
+
+
+class CredentialParams(namedtuple(
+        'CredentialParams',
+        ['pk', 'application'] + [key for key, _ in settings.REGISTERED_PARAMS],
+        defaults=[None] * len(settings.REGISTERED_PARAMS))):
+    """
+    Immutable credential params, one field for each registered param.
+    Reading a param that isn't defined in the credential raises
+    MissingParameter (getattr with a default can read optional params).
+    """
+
+    __slots__ = ()
+
+    def __getattribute__(self, name):
+        value = super().__getattribute__(name)
+        if value is None and name in REGISTERED_KEYS:
+            raise MissingParameter(
+                'The parameter "{}" is required in the credential {} ({}).'
+                .format(name, self.pk, self.application)
+            )
+
+        return value
+
+
+class CredentialCache:
+    """
+    In-process cache of CredentialParams.
+    Elements are invalidated when a Credential or CredentialParameter is
+    saved or deleted (signals), and expire after settings.CREDENTIALS_TTL
+    seconds to get changes made by other processes.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # pk: (CredentialParams, expires)
+        self.data = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '{}(size={}, hits={}, misses={}, hit_rate={:.2f})'.format(
+            self.__class__.__name__,
+            len(self.data),
+            self.hits,
+            self.misses,
+            self.hit_rate
+        )
+
+    @property
+    def hit_rate(self):
+        """ Rate of gets resolved without queries. """
+
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def stats(self):
+        """ Return a dict with the cache metrics. """
+
+        return {
+            "size": len(self.data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate
+        }
+
+    def get(self, credential):
+        """ Return the CredentialParams of a Credential instance. """
+
+        with self.lock:
+            cached = self.data.get(credential.pk)
+            if cached and cached[1] > time.monotonic():
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        # all params in one query, first value of each key
+        values = {}
+        for key, value in credential.credentialparameter_set.order_by(
+                'pk').values_list('key', 'value'):
+            values.setdefault(key, value)
+
+        params = CredentialParams(
+            pk=credential.pk,
+            application=credential.application,
+            **values
+        )
+
+        with self.lock:
+            self.data[credential.pk] = (params, time.monotonic() + self.ttl)
+
+        return params
+
+    def invalidate(self, pk: int = None):
+        """ Remove a credential (primary key) or all of them. """
+
+        with self.lock:
+            if pk is None:
+                self.data.clear()
+            else:
+                self.data.pop(pk, None)
+
+
 class Credential(models.Model):
 
     application = models.CharField(
@@ -35,9 +154,17 @@ class Credential(models.Model):
 
     comment = models.CharField(max_length=100, blank=True, null=True)
 
+    # process-wide cache of params
+    cache = CredentialCache(ttl=settings.CREDENTIALS_TTL)
+
     def __str__(self):
         return f'{self.get_application_display()} | {self.comment}'
 
+    def get_params(self):
+        """ Return the (cached) CredentialParams of the credential. """
+
+        return Credential.cache.get(self)
+
 class CredentialParameter(models.Model):
 
     credential = models.ForeignKey("Credential", on_delete=models.CASCADE)
@@ -88,6 +215,33 @@ class Sync(models.Model):
         ))
     )
     active = models.BooleanField(default=True)
+    streaming = models.BooleanField(
+        default=False,
+        help_text=_(
+            'Send the source data to the target in chunks while it is being '
+            'obtained. Processes are executed for each chunk.'
+        )
+    )
+    fingerprint_field = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        help_text=_(
+            'Identity field of the records sent to the target (rget path, '
+            'eg. "employeeCode"). If informed, only new or changed records '
+            'are sent.'
+        )
+    )
+    watermark_field = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        help_text=_(
+            'Timestamp field of the source records (rget path, eg. '
+            '"modified"). Next runs get the records from the max value '
+            'delivered. If empty, from the start of the last successful run.'
+        )
+    )
     status = models.CharField(
         max_length=1,
         null=True,
@@ -96,46 +250,148 @@ class Sync(models.Model):
         default=settings.TASK_STATUS[0][0]
     )
 
+    # denormalized runs, maintained by run() and save()
+    last_started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+    last_finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+    next_run_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # high-water mark of the source data, advanced by successful runs only
+    watermark = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['active', 'status', 'next_run_at'],
+                name='sync_needs_run_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.get_synchronize_display()
 
+    def save(self, *args, **kwargs):
+        # keep next run updated with cron_expression changes
+        self.next_run_at = self.compute_next_run()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'next_run_at' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['next_run_at']
+
+        super().save(*args, **kwargs)
+
     @classmethod
     def get_needs_run(cls, **kwargs) -> list:
         """ Returns all elements that need to run """
 
-        def filter_(obj):
-            return obj.needs_run()
-
-        # get all active and needs run syncs
-        return list(filter(
-            filter_,
-            cls.objects.filter(active=True, status__in=('0', '2'))
+        # queued or pending with next run reached
+        return list(cls.objects.filter(active=True).filter(
+            models.Q(status='2') | models.Q(status='0', next_run_at__lte=now())
         ))
 
     @classmethod
-    def run_needs(cls, **kwargs) -> bool:
-        """ Run syncs that needs to run. """
+    def reset_running(cls) -> int:
+        """
+        Set as pending the syncs left running by a process that ended while
+        running them, and close their unfinished histories. Must be called
+        when no sync is running (eg. at the start of the scheduler).
+        Returns the number of reset syncs.
+        """
 
-        # default
-        result = True
+        with transaction.atomic():
+            syncs = list(
+                cls.objects.filter(status='1').values_list('id', flat=True)
+            )
+            SyncHistory.objects.filter(
+                sync_id__in=syncs,
+                end_time__isnull=True
+            ).update(
+                end_time=now(),
+                ok=False,
+                message='Interrupted, the process ended while running.'
+            )
+            cls.objects.filter(pk__in=syncs).update(status='0')
+
+        return len(syncs)
+
+    @classmethod
+    def run_needs(cls, workers: int = 1, **kwargs) -> bool:
+        """ Run syncs that needs to run. """
 
         # get needs_run only
-        for sync in cls.get_needs_run():
-            result = result if sync.run() else False
+        return cls.run_all(cls.get_needs_run(), workers=workers)
 
-        return result
+    @classmethod
+    def run_all(cls, syncs, workers: int = 1, force: bool = False) -> bool:
+        """
+        Run all recived syncs and return False if any of them fails.
+
+        @@ Parameters
+        @syncs (iterable):
+            Sync instances to run.
+        @workers (int):
+            Number of syncs to run in parallel. 1 (sequential) by default.
+            Syncs with the same target are limited to
+            settings.SYNC_DESTINY_WORKERS parallel runs.
+        @force (bool):
+            Run the syncs even if they don't need to run.
+        """
+
+        # sequential run
+        if workers <= 1:
+            result = True
+            for sync in syncs:
+                result = result if sync.run(force=force) else False
+            return result
+
+        with cls.get_executor(workers) as executor:
+            futures = [sync.submit(executor, force=force) for sync in syncs]
+
+        return all(future.result() for future in futures)
+
+    @staticmethod
+    def get_executor(workers: int) -> concurrency.KeyedExecutor:
+        """
+        Return a pool to run syncs in parallel (Sync.submit), with at most
+        settings.SYNC_DESTINY_WORKERS parallel runs of the same target.
+        """
+
+        return concurrency.KeyedExecutor(
+            workers=workers,
+            key_limit=settings.SYNC_DESTINY_WORKERS
+        )
+
+    def submit(self, executor, force: bool = False):
+        """
+        Schedule the run of the sync in an executor of Sync.get_executor.
+        Syncs of a target that reached its limit wait without taking a
+        worker.
+
+        @@ Returns
+        @Future: Future with the result of run.
+        """
+
+        return executor.submit(self.destiny_id, self.run_thread, force)
+
+    def run_thread(self, force: bool = False):
+        """ Same as run, closing the db connections opened by the thread. """
+
+        try:
+            return self.run(force=force)
+        finally:
+            connections.close_all()
 
     def get_last_run(self):
-        """ Get last sync history of sync and return end_time property. """
-        
-        # get last history
-        history = self.synchistory_set.last()
+        """ Return the end time of the last finished run. """
 
-        # if never run
-        if not history:
-            return None
-        # return end_time
-        return history.end_time
+        return self.last_finished_at
     get_last_run.short_description = "Last Run"
 
     def get_previous_run(self):
@@ -157,13 +413,18 @@ class Sync(models.Model):
 
     def get_next_run(self):
         """ Return datetime with scheduled next time. """
+
+        return self.next_run_at
+    get_next_run.short_description = "Next Run"
+
+    def compute_next_run(self):
+        """ Calculate next run with cron expression and last finished run. """
         try:
-            lr = self.get_last_run()
+            lr = self.last_finished_at
             cron = croniter.croniter(self.cron_expression, lr or now())
             return cron.get_next(dt.datetime)
         except Exception as error:
             return None
-    get_next_run.short_description = "Next Run"
     
     def needs_run(self):
         """ Determines if it needs to run depending on the cron expression. """
@@ -206,20 +467,67 @@ class Sync(models.Model):
     is_valid.short_description = "Is valid"
     is_valid.boolean = True
 
-    def run(self):
+    def claim(self, force: bool = False) -> bool:
+        """
+        Set the sync as running in a single statement.
+        Returns False if it was already running (claimed by another worker or
+        process) or if it doesn't need to run anymore (finished by another
+        worker after the caller read it).
+
+        @@ Parameters
+        @force (bool):
+            Claim the sync even if it doesn't need to run (manual runs).
+        """
+
+        syncs = Sync.objects.filter(pk=self.pk)
+        if force:
+            syncs = syncs.exclude(status='1')
+        else:
+            # queued or pending with next run reached
+            syncs = syncs.filter(active=True).filter(
+                models.Q(status='2') |
+                models.Q(status='0', next_run_at__lte=now())
+            )
+
+        claimed = syncs.update(status='1')
+
+        if claimed:
+            self.status = '1'
+
+        return bool(claimed)
+
+    def run(self, force: bool = False):
         """
         Execute the synchronization obtaining the source and destination 
         methods and parameters.
+
+        @@ Parameters
+        @force (bool):
+            Run the sync even if it doesn't need to run (manual runs).
         """
 
-        self.status = '1'
-        self.save()
+        with transaction.atomic():
+            # running in another worker or already run, nothing to do
+            if not self.claim(force=force):
+                return True
+
+            # history create
+            logg = SyncHistory.objects.create(
+                sync=self,
+                ok=True
+            )
+
+            self.last_started_at = logg.start_time
+            Sync.objects.filter(pk=self.pk).update(
+                last_started_at=self.last_started_at
+            )
+
+            # advanced by other instances of the sync
+            self.refresh_from_db(fields=['watermark'])
+
+        # clients, to get their stats and partial errors
+        from_client = to_client = None
 
-        # history create
-        logg = SyncHistory.objects.create(
-            sync=self,
-            ok=True
-        )
         try:
             # get configs
             from_app = self.origin.application
@@ -242,17 +550,11 @@ class Sync(models.Model):
             from_class = rgetattr(connectors, from_class_name)
             to_class = rgetattr(connectors, to_class_name)
             
-            # get last run in datetime object
-            last_run = dt.datetime.strptime(
-                '2000-01-01 00:00:00',
-                "%Y-%m-%d %H:%M:%S"
-            )
-            if self.get_previous_run():
-                # offset calculate
-                tz = timezone.get_current_timezone()
-                pr = self.get_previous_run()
+            # get data from the watermark (with overlap)
+            last_run = self.get_since()
 
-                last_run = pr + tz.utcoffset(dt.datetime.now())
+            # max source timestamp delivered in this run
+            high = None
 
             # create clients
             from_client = from_class(
@@ -268,6 +570,12 @@ class Sync(models.Model):
             from_method = rgetattr(from_client, from_method_name)
             to_method = rgetattr(to_client, to_method_name)
 
+            # source confirmation of delivered data (connectors that need it)
+            mark_delivered = getattr(from_client, 'mark_delivered', None)
+
+            # false if the target didn't report success for any chunk
+            delivered = True
+
             # mapping req parameters with application values
             from_params = self.syncparameter_set.filter(use_in='origin')
             to_params = self.syncparameter_set.filter(use_in='destiny')
@@ -290,27 +598,77 @@ class Sync(models.Model):
                 else:
                     parsed_to_params[p.key] = eval(p.value)
 
-            # execute from method
-            from_response = from_method(**parsed_from_params)
-            # print(from_response)
+            if self.streaming:
+                # source generator if connector supports it
+                if from_.get('stream'):
+                    from_stream = rgetattr(from_client, from_.get('stream'))
+                    from_response = from_stream(**parsed_from_params)
+                else:
+                    # buffering adapter for connectors that can't stream
+                    from_response = iter(from_method(**parsed_from_params))
+
+                processes = list(self.syncprocess_set.all())
+                fingerprints = self.get_fingerprints()
 
-            # execute custom processes
-            for process in self.syncprocess_set.all():
-                # recursive call
-                from_response = process.execute(self, from_response)
+                # execute processes and to method chunk by chunk
+                for chunk in api.chunked(from_response, \
+                        settings.SYNC_CHUNK_SIZE):
+                    high = self.get_max_timestamp(chunk, high)
+                    chunk = self.execute_processes(chunk, processes)
+
+                    # only new or changed records
+                    chunk, pending = self.filter_changed(chunk, fingerprints)
+                    if self.fingerprint_field and not chunk:
+                        continue
+
+                    to_response = to_method(chunk, **parsed_to_params)
 
-            # execute to method passing connector response
-            to_response = to_method(from_response, **parsed_to_params)
+                    # only records the target reported as received
+                    if to_response:
+                        self.save_fingerprints(pending, fingerprints)
+                    else:
+                        delivered = False
+
+            else:
+                # execute from method
+                from_response = from_method(**parsed_from_params)
+                # print(from_response)
+                high = self.get_max_timestamp(from_response)
+
+                # execute custom processes
+                from_response = self.execute_processes(
+                    from_response,
+                    self.syncprocess_set.all()
+                )
+
+                # only new or changed records
+                from_response, pending = self.filter_changed(
+                    from_response,
+                    self.get_fingerprints()
+                )
+
+                # execute to method passing connector response
+                if from_response or not self.fingerprint_field:
+                    to_response = to_method(from_response, **parsed_to_params)
+
+                    # only records the target reported as received
+                    if to_response:
+                        self.save_fingerprints(pending)
+                    else:
+                        delivered = False
+
+            # once the source was closed, rows without changes (not sent)
+            # are confirmed too
+            if mark_delivered and delivered:
+                mark_delivered()
 
             # log update
             logg.end_time = now()
-            logg.save()
-
-            # update status
-            self.status = '0'
-            self.save()
+            logg.set_stats(to_client)
+            logg.set_errors(from_client, to_client)
+            self.finish(logg, watermark=high, delivered=delivered)
 
-            return True
+            return logg.ok
 
         except Exception as error:
             
@@ -322,13 +680,216 @@ class Sync(models.Model):
                 value=error,
                 tb=error.__traceback__
             )) if settings.DEBUG and settings.LOG_TRACEBACK else str(error)
+            logg.set_stats(to_client)
+            self.finish(logg)
+
+            return False
+
+    def execute_processes(self, data: list, processes) -> list:
+        """
+        Execute processes in order passing the result of each one to the
+        next. Consecutive columnar processes share the same DataFrame, so
+        data is converted once to DataFrame and once back to records.
+
+        @@ Parameters
+        @data (list):
+            List of dict elements (source response).
+        @processes (iterable):
+            SyncProcess instances to execute.
+
+        @@ Returns
+        @list: Data processed.
+        """
+
+        frame = None
+        for process in processes:
+            if process.columnar:
+                if frame is None:
+                    frame = api.records_to_frame(data)
+                frame = process.execute(self, frame)
+            else:
+                if frame is not None:
+                    data = api.frame_to_records(frame)
+                    frame = None
+                # recursive call
+                data = process.execute(self, data)
+
+        # back to records for the target
+        if frame is not None:
+            data = api.frame_to_records(frame)
+
+        return data
+
+    def get_fingerprints(self) -> dict:
+        """ Return {key: digest} of the records sent in previous runs. """
+
+        if not self.fingerprint_field:
+            return {}
+
+        return dict(self.syncfingerprint_set.values_list('key', 'digest'))
+
+    def filter_changed(self, data, fingerprints: dict):
+        """
+        Remove the records of data that were already sent without changes.
+        Records without identity value are always sent.
+
+        @@ Parameters
+        @data (list):
+            List of dict elements (processed source response).
+        @fingerprints (dict):
+            {key: digest} of the records sent in previous runs.
+
+        @@ Returns
+        @tuple: List of new or changed records and dict {key: digest} with
+            their fingerprints, to save when the target accepts them.
+        """
+
+        if not self.fingerprint_field or not isinstance(data, list):
+            return data, {}
+
+        get = get_accessor(self.fingerprint_field, None)
+
+        changed = []
+        pending = {}
+        for record in data:
+            try:
+                key = get(record)
+            except AttributeError:
+                # not a dict or incomplete path
+                key = None
+
+            if key is None or key == '':
+                changed.append(record)
+                continue
+
+            key = str(key)
+            digest = SyncFingerprint.get_digest(record)
+            if fingerprints.get(key) != digest:
+                changed.append(record)
+                pending[key] = digest
+
+        return changed, pending
+
+    def save_fingerprints(self, pending: dict, fingerprints: dict = None):
+        """
+        Save the fingerprints of the records accepted by the target.
+
+        @@ Parameters
+        @pending (dict):
+            {key: digest} returned by filter_changed.
+        @fingerprints (dict):
+            Optional dict of fingerprints to update with pending.
+        """
+
+        if not pending:
+            return
+
+        with transaction.atomic():
+            for keys in api.chunked(pending, 500):
+                self.syncfingerprint_set.filter(key__in=keys).delete()
+                SyncFingerprint.objects.bulk_create([
+                    SyncFingerprint(sync=self, key=key, digest=pending[key]) \
+                        for key in keys
+                ])
+
+        if fingerprints is not None:
+            fingerprints.update(pending)
+
+    def clear_fingerprints(self) -> int:
+        """ Remove the fingerprints to send all records in the next run. """
+
+        return self.syncfingerprint_set.all().delete()[0]
+
+    def get_since(self) -> dt.datetime:
+        """
+        Return the (naive, local time) datetime from which the source must get
+        data: the watermark minus settings.SYNC_WATERMARK_OVERLAP seconds, or
+        2000-01-01 if the sync never finished successfully.
+        """
+
+        if not self.watermark:
+            return dt.datetime(2000, 1, 1)
+
+        since = self.watermark - dt.timedelta(
+            seconds=settings.SYNC_WATERMARK_OVERLAP
+        )
+        return timezone.localtime(since).replace(tzinfo=None)
+
+    def get_max_timestamp(self, records, current: dt.datetime = None):
+        """
+        Return the max datetime of watermark_field in the source records.
+
+        @@ Parameters
+        @records (list):
+            List of dict elements (source response).
+        @current (datetime):
+            Max datetime of previous records (chunks), if any.
+
+        @@ Returns
+        @datetime: Aware datetime, current if records don't have a greater
+            valid timestamp. Naive values are in the current time zone.
+        """
+
+        if not self.watermark_field or not isinstance(records, list):
+            return current
+
+        get = get_accessor(self.watermark_field, None)
+        for record in records:
+            try:
+                value = get(record)
+                if isinstance(value, str) and value:
+                    value = parse_date(value)
+            except (AttributeError, ValueError, OverflowError):
+                # not a dict, incomplete path or invalid date
+                continue
+
+            if not isinstance(value, dt.datetime):
+                continue
+
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value, is_dst=False)
+
+            if current is None or value > current:
+                current = value
+
+        return current
+
+    def finish(self, logg, watermark: dt.datetime = None, \
+            delivered: bool = True):
+        """
+        Save the history of the run and update status, last finished and next
+        run of the sync in the same transaction.
+        Successful runs advance the watermark to the max source timestamp
+        received (watermark*) or to the start of the run, only if the target
+        reported success for all the data (delivered*).
+        """
+
+        with transaction.atomic():
             logg.save()
 
-            # update status
+            # cron_expression could be changed while running
+            self.refresh_from_db(fields=['cron_expression'])
+
+            # update status and runs
             self.status = '0'
-            self.save()
+            self.last_finished_at = logg.end_time
+            self.next_run_at = self.compute_next_run()
+            runs = dict(
+                status=self.status,
+                last_finished_at=self.last_finished_at,
+                next_run_at=self.next_run_at
+            )
 
-            return False
+            if logg.ok and delivered:
+                # source timestamps after the start can be incomplete
+                if not watermark or watermark > logg.start_time:
+                    watermark = logg.start_time
+
+                # never backwards
+                if not self.watermark or watermark > self.watermark:
+                    self.watermark = runs['watermark'] = watermark
+
+            Sync.objects.filter(pk=self.pk).update(**runs)
 
 
 class SyncParameter(models.Model):
@@ -367,6 +928,18 @@ class SyncHistory(models.Model):
 
     message = models.TextField(blank=True, null=True)
 
+    # json with latency and throughput informed by the target connector
+    stats = models.TextField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['end_time'], name='synchistory_end_time_idx'),
+            models.Index(
+                fields=['sync', 'start_time'],
+                name='synchistory_sync_start_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.sync} | {self.start_time.strftime("%d/%m/%Y %H:%M:%S")}'
 
@@ -380,22 +953,105 @@ class SyncHistory(models.Model):
     get_destiny.short_description = "Target"
     get_destiny.admin_order_field = "sync__destiny"
 
+    def set_stats(self, client):
+        """ Save the stats (concurrency.ChunkStats) of a connector client. """
+
+        stats = getattr(client, 'stats', None)
+        if stats is not None:
+            self.stats = json.dumps(stats.as_dict())
+
+    def set_errors(self, *clients):
+        """
+        Save the partial errors (errors* list) informed by connector clients.
+        The run is not ok, although the rest of the data was sent.
+        """
+
+        errors = [
+            error for client in clients \
+                for error in getattr(client, 'errors', None) or []
+        ]
+        if errors:
+            self.ok = False
+            self.message = '\n'.join(errors)
+
     @classmethod
-    def delete_olds(cls, force: bool = False):
+    def delete_olds(cls, force: bool = False, batch_size: int = None, \
+            pause: float = None) -> int:
         """
         Delete old objects using settings.LOG_AUTOCLEAN_DAYS offset.
+        Rows are deleted in batches to avoid long locks and big transactions.
+
+        @@ Parameters
+        @force (bool):
+            Delete ignoring settings.LOG_AUTOCLEAN.
+        @batch_size (int):
+            Max rows to delete in each statement.
+            settings.LOG_AUTOCLEAN_BATCH_SIZE by default.
+        @pause (float):
+            Seconds to wait between batches.
+            settings.LOG_AUTOCLEAN_PAUSE by default.
+
+        @@ Returns
+        @int: Number of deleted rows.
         """
 
         # explicit declare to work it
-        if settings.LOG_AUTOCLEAN or force:
+        if not settings.LOG_AUTOCLEAN and not force:
+            return 0
+
+        batch_size = batch_size or settings.LOG_AUTOCLEAN_BATCH_SIZE
+        if pause is None:
+            pause = settings.LOG_AUTOCLEAN_PAUSE
+
+        # last date to delete
+        datetime_to = now() - dt.timedelta(
+            days=settings.LOG_AUTOCLEAN_DAYS
+        )
+        olds = cls.objects.filter(end_time__lt=datetime_to)
+
+        deleted = 0
+        while True:
+            # get a batch of primary keys and delete them
+            pks = list(olds.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+
+            deleted += cls.objects.filter(pk__in=pks).delete()[0]
+
+            # last batch
+            if len(pks) < batch_size:
+                break
+
+            if pause:
+                time.sleep(pause)
+
+        return deleted
+
+class SyncFingerprint(models.Model):
+    """ Hash of the last version of a record sent to the target. """
+
+    sync = models.ForeignKey("Sync", on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    digest = models.CharField(max_length=32)
+
+    class Meta:
+        unique_together = [['sync', 'key']]
+
+    def __str__(self):
+        return f'{self.sync} | {self.key}'
+
+    @staticmethod
+    def get_digest(record) -> str:
+        """ Return a stable hash of a record (independent of keys order). """
+
+        dump = json.dumps(
+            record,
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.blake2b(dump.encode(), digest_size=16).hexdigest()
 
-            # last date to delete
-            datetime_to = now() - dt.timedelta(
-                days=settings.LOG_AUTOCLEAN_DAYS
-            )
-            
-            # get, delete and return result
-            return cls.objects.filter(end_time__lt=datetime_to).delete()
 
 class SyncProcess(models.Model):
     sync = models.ForeignKey("Sync", on_delete=models.CASCADE)
@@ -415,6 +1071,13 @@ class SyncProcess(models.Model):
         blank=True,
         help_text='Procedure that can process the "origin_response".'
     )
+    columnar = models.BooleanField(
+        default=False,
+        help_text=_(
+            'The procedure receives and returns a pandas DataFrame instead '
+            'of a list of dict.'
+        )
+    )
 
     class Meta:
         ordering = ['order']
@@ -422,30 +1085,128 @@ class SyncProcess(models.Model):
     def __str__(self):
         return self.name
 
-    def set_method(self):
-        
-        # requirements to locals
-        if self.requirements: 
-            if not isinstance(self.requirements, list):
-                requirements = self.requirements.replace(' ', '').split(',')
-            else:
-                requirements = self.requirements
-
-            for req in requirements:
-                # parse if is submodule
-                req_name = req.split('.')
-                import_express = '{} = importlib.import_module("{}")'.format(
-                    req_name[-1],
-                    req
-                )
-                exec(import_express)
+    # process-wide cache of compiled methods, {(pk, hash): method}
+    methods = {}
+    methods_lock = threading.Lock()
+
+    def get_key(self):
+        """ Key of the compiled method in SyncProcess.methods. """
+
+        return (
+            self.pk,
+            hash((self.name, self.expression, self.requirements))
+        )
+
+    def get_requirements(self) -> list:
+        """ Return the list of modules to import. """
+
+        if not self.requirements:
+            return []
+
+        if isinstance(self.requirements, list):
+            return self.requirements
+
+        return [
+            req for req in self.requirements.replace(' ', '').split(',') if req
+        ]
+
+    def compile_method(self):
+        """
+        Compile the expression and return the method named like the process.
+        The method can use the requirements and the names of this module.
+        """
+
+        namespace = dict(globals())
+
+        # requirements to namespace
+        for req in self.get_requirements():
+            # use last name if is submodule
+            namespace[req.split('.')[-1]] = importlib.import_module(req)
 
         # method expression
-        method_expression = self.expression + '\n'
-        method_expression += f'self.method = {self.name}'
-        exec(method_expression)
-        return self.method
+        code = compile(
+            self.expression + '\n',
+            f'<SyncProcess {self.pk}: {self.name}>',
+            'exec'
+        )
+        exec(code, namespace)
+
+        return namespace[self.name]
+
+    def set_method(self):
+        """ Get the compiled method from cache or compile and cache it. """
+
+        key = self.get_key()
+        method = SyncProcess.methods.get(key)
+
+        if method is None:
+            method = self.compile_method()
+
+            with SyncProcess.methods_lock:
+                # remove old versions of the process
+                SyncProcess.uncache(self.pk)
+                SyncProcess.methods[key] = method
+
+        self.method = method
+        return method
+
+    @classmethod
+    def uncache(cls, pk: int):
+        """ Remove compiled methods of a process (primary key). """
+
+        for key in [key for key in cls.methods if key[0] == pk]:
+            cls.methods.pop(key, None)
+
+    @classmethod
+    def precompile(cls) -> tuple:
+        """
+        Compile and cache processes of all active syncs.
+        Processes that can't be compiled are skipped, so only their syncs
+        fail when they run.
+
+        @@ Returns
+        @tuple: Number of compiled processes and list of dict errors with
+            'process' (primary key) and 'error' keys.
+        """
+
+        compiled = 0
+        errors = []
+
+        for process in cls.objects.filter(sync__active=True):
+            try:
+                process.set_method()
+                compiled += 1
+            except Exception as error:
+                errors.append({"process": process.pk, "error": repr(error)})
+
+        return compiled, errors
 
     def execute(self, *args, **kwargs):
-        method = getattr(self, 'method', self.set_method())
-        return method(*args, **kwargs)
+        return self.set_method()(*args, **kwargs)
+
+
+@receiver(post_save, sender=Credential)
+@receiver(post_delete, sender=Credential)
+def credential_changed(sender, instance, **kwargs):
+    """ Invalidate cached params and pooled clients of the credential. """
+
+    Credential.cache.invalidate(instance.pk)
+    connections_pool.discard(instance.pk)
+
+
+@receiver(post_save, sender=CredentialParameter)
+@receiver(post_delete, sender=CredentialParameter)
+def credential_parameter_changed(sender, instance, **kwargs):
+    """ Invalidate cached params and pooled clients of the credential. """
+
+    Credential.cache.invalidate(instance.credential_id)
+    connections_pool.discard(instance.credential_id)
+
+
+@receiver(post_save, sender=SyncProcess)
+@receiver(post_delete, sender=SyncProcess)
+def sync_process_changed(sender, instance, **kwargs):
+    """ Remove compiled methods of the process. """
+
+    with SyncProcess.methods_lock:
+        SyncProcess.uncache(instance.pk)
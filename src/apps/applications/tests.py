@@ -1,3 +1,816 @@
+import contextlib
+import datetime as dt
+import math
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.applications import models
+from utils import api
+from utils import concurrency
+from utils import connectors
+from utils.connectors import specmanagerdb
+from utils.connectors import visma
+
+import pandas as pd
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+
+class FieldsPlanTestCase(TestCase):
+    """ FieldsPlan must return the same as apply_fields_def. """
+
+    structure = [
+        {"id": 1, "name": "Juan", "gender": "M", "type": "1",
+            "date": "2021-05-03", "time": "10:30"},
+        {"id": 2, "name": "Ana", "gender": "female", "type": "2",
+            "date": None, "time": None},
+        {"id": 3, "name": None, "gender": None, "type": "3",
+            "date": "03/05/2021", "time": "08:05"},
+        {"id": 4},
+    ]
+
+    fields = [
+        {"in": "id", "out": "code"},
+        {"in": "name", "out": "name", "default": "unknown"},
+        {"in": "gender", "out": "gender", "steps": [
+            {"method": "get_gender_acronym"}
+        ]},
+        {"in": "type", "out": "type", "default": "other", "steps": [
+            {"method": "switch", "args": [{"1": "in", "2": "out"}]}
+        ]},
+        {"in": "date", "out": "date", "steps": [
+            {"method": "time_format", "args": ["%Y%m%d"]}
+        ]},
+        {"in": "time", "out": "hour", "steps": [
+            {"method": "split", "args": [":"]},
+            {"method": "get_from_list", "args": ["0"]}
+        ]},
+    ]
+
+    def assertParity(self, fields):
+        expected = api.apply_fields_def(
+            self.structure,
+            [api.FieldDefinition.from_json(f) for f in fields]
+        )
+
+        plan = api.FieldsPlan.from_json(fields)
+        self.assertEqual(plan.apply(self.structure), expected)
+        self.assertEqual(plan.apply_columnar(self.structure), expected)
+        self.assertEqual(api.apply_fields_plan(self.structure, fields), \
+            expected)
+        self.assertEqual(api.apply_fields_columnar(self.structure, fields), \
+            expected)
+
+    def test_json_fields(self):
+        self.assertParity(self.fields)
+
+    def test_columnar_frame(self):
+        # same values as the records, the connectors can read both
+        frame = pd.DataFrame(self.structure)
+        self.assertEqual(
+            api.apply_fields_columnar(frame, self.fields),
+            api.apply_fields_plan(self.structure, self.fields)
+        )
+
+    def test_row_wise_fallback(self):
+        fields = [{"in": "id", "out": "code"}]
+        plan = api.FieldsPlan.from_json(fields)
+
+        self.assertTrue(api.FieldsPlan.from_json(self.fields).vectorized)
+        self.assertFalse(plan.vectorized)
+        with mock.patch.object(api.FieldsPlan, 'apply_columnar') as columnar:
+            self.assertEqual(
+                api.apply_fields_columnar(self.structure, fields),
+                [{"code": i} for i in range(1, 5)]
+            )
+        columnar.assert_not_called()
+
+    def test_cached_plan(self):
+        self.assertIs(
+            api.FieldsPlan.from_json(self.fields),
+            api.FieldsPlan.from_json(self.fields)
+        )
+
+    def test_python_int_keys(self):
+        # int keys never match in switch, json dump would turn them to str
+        fields = [{"in": "type", "out": "type", "default": "other", "steps": [
+            {"method": "switch", "args": [{1: "in", 2: "out"}]}
+        ]}]
+        self.assertParity(fields)
+        self.assertEqual(
+            [e.get("type") for e in api.apply_fields_plan(
+                self.structure, fields)],
+            ["other"] * len(self.structure)
+        )
+
+    def test_python_date_default(self):
+        fields = [
+            {"in": "date", "out": "date", "default": dt.date(2021, 1, 1)}
+        ]
+        self.assertParity(fields)
+
+
+class FrameToDictTestCase(TestCase):
+    """ frame_to_dict must return the same as DataFrame.to_dict. """
+
+    columns = ["c0", "c1", "c2"]
+    index = ["r0", "r1", "r2"]
+
+    cases = {
+        "ints": [[1, 2, 3], [4, 5, 6], [7, 8, 9]],
+        "floats": [[1.5, 2, 3], [4.5, 5, 6], [7.5, 8, 9]],
+        "ints_with_nulls": [[1, None, 3], [4, 5, None], [7, 8, 9]],
+        "bools": [[True, False, 1], [False, True, 2], [True, True, 3]],
+        "strs": [["a", "b", 1], ["c", "d", 2], ["e", "f", 3]],
+        "strs_with_nulls": [["a", None, 1], [None, "d", 2], ["e", "f", 3]],
+        "mixed": [["a", 1, None], [2, 1.5, None], [True, "b", None]],
+        "nulls": [[None, None, None], [None, None, None], [None, 1, "a"]],
+    }
+
+    def normalize(self, obj):
+        """ Comparable structure, NaN equal to NaN and numpy to python. """
+
+        if isinstance(obj, dict):
+            return {k: self.normalize(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self.normalize(v) for v in obj]
+        if hasattr(obj, 'item'):
+            obj = obj.item()
+        if isinstance(obj, float) and math.isnan(obj):
+            return 'NaN'
+
+        return (type(obj).__name__, obj)
+
+    def assertParity(self, data, columns, index):
+        for orient in api.FRAME_ORIENTS:
+            for transpose in (False, True):
+                with self.subTest(orient=orient, transpose=transpose):
+                    frame = pd.DataFrame(data, columns=columns, index=index)
+                    if transpose:
+                        frame = frame.T
+
+                    self.assertEqual(
+                        self.normalize(api.frame_to_dict(
+                            data,
+                            columns=columns,
+                            index=index,
+                            orient=orient,
+                            transpose=transpose
+                        )),
+                        self.normalize(frame.to_dict(orient))
+                    )
+
+    def test_cases(self):
+        for name, data in self.cases.items():
+            with self.subTest(case=name):
+                self.assertParity(data, self.columns, self.index)
+
+    def test_empty(self):
+        self.assertParity([], self.columns, [])
+        self.assertParity([[], []], [], ["r0", "r1"])
+
+
+class SyncTestCase(TestCase):
+    """ TestCase with helpers to create syncs. """
+
+    def create_sync(self, **kwargs):
+        return models.Sync.objects.create(
+            synchronize=kwargs.pop('synchronize', 'employees'),
+            origin=kwargs.pop('origin', None) or \
+                models.Credential.objects.create(application='nettime6'),
+            destiny=kwargs.pop('destiny', None) or \
+                models.Credential.objects.create(application='visma'),
+            cron_expression=kwargs.pop('cron_expression', '* * * * *'),
+            **kwargs
+        )
+
+
+class SyncQueriesTestCase(SyncTestCase):
+    """
+    Last and next runs are columns of Sync (last_finished_at, next_run_at),
+    so lists of syncs don't query the history for each one.
+    """
+
+    def create_syncs(self, count: int):
+        origin = models.Credential.objects.create(application='nettime6')
+        destiny = models.Credential.objects.create(application='visma')
+        for _ in range(count):
+            sync = self.create_sync(origin=origin, destiny=destiny)
+            models.SyncHistory.objects.create(
+                sync=sync,
+                end_time=timezone.now()
+            )
+
+    def test_needs_run(self):
+        self.create_syncs(20)
+
+        with self.assertNumQueries(1):
+            syncs = models.Sync.get_needs_run()
+            for sync in syncs:
+                sync.needs_run()
+                sync.get_last_run()
+                sync.get_next_run()
+
+    def test_changelist(self):
+        self.client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'admin'
+        ))
+        url = reverse('admin:applications_sync_changelist')
+
+        self.create_syncs(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.create_syncs(20)
+        with self.assertNumQueries(len(queries)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class FakeClient:
+    """
+    Connector of the tests. Gets FakeClient.records and saves the received
+    data in FakeClient.sent, returning FakeClient.response.
+    """
+
+    records = []
+    sent = []
+    response = True
+
+    def __init__(self, source, last_run: dt.datetime, **kwargs):
+        self.source = source
+        self.last_run = last_run
+
+    def get_items(self, **kwargs):
+        return [dict(record) for record in FakeClient.records]
+
+    def iter_items(self, **kwargs):
+        yield from self.get_items()
+
+    def post_items(self, items: list, **kwargs):
+        FakeClient.sent.append(list(items))
+        return FakeClient.response
+
+
+class SyncRunTestCase(SyncTestCase):
+    """ SyncTestCase with the "fake" sync type of FakeClient. """
+
+    def setUp(self):
+        FakeClient.records = [
+            {"id": 1, "updated": "2021-01-01T10:00:00"},
+            {"id": 2, "updated": "2021-01-02T10:00:00"},
+        ]
+        FakeClient.sent = []
+        FakeClient.response = True
+
+        patches = [
+            mock.patch.dict(settings.CONNECTORS, {'fake': {
+                'from': {'nettime6': {
+                    'class_': 'fake.Client',
+                    'method': 'get_items',
+                    'stream': 'iter_items',
+                }},
+                'to': {'visma': {
+                    'class_': 'fake.Client',
+                    'method': 'post_items',
+                }},
+            }}),
+            mock.patch.object(
+                connectors,
+                'fake',
+                SimpleNamespace(Client=FakeClient),
+                create=True
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def create_sync(self, **kwargs):
+        return super().create_sync(synchronize='fake', **kwargs)
+
+
+class WatermarkTestCase(SyncRunTestCase):
+
+    def test_advance_on_delivery(self):
+        sync = self.create_sync(watermark_field='updated')
+
+        self.assertTrue(sync.run(force=True))
+
+        sync.refresh_from_db()
+        self.assertEqual(
+            sync.watermark,
+            timezone.make_aware(dt.datetime(2021, 1, 2, 10))
+        )
+
+    def test_falsy_response(self):
+        sync = self.create_sync(watermark_field='updated')
+        FakeClient.response = False
+
+        sync.run(force=True)
+
+        sync.refresh_from_db()
+        self.assertEqual(len(FakeClient.sent), 1)
+        self.assertIsNone(sync.watermark)
+
+
+class FingerprintTestCase(SyncRunTestCase):
+
+    def test_filter_changed(self):
+        sync = self.create_sync(fingerprint_field='id')
+        data = [{"id": 1, "v": "a"}, {"id": 2, "v": "b"}, {"v": "no id"}]
+
+        changed, pending = sync.filter_changed(data, {})
+        self.assertEqual(changed, data)
+        self.assertEqual(set(pending), {'1', '2'})
+
+        # unchanged records are removed, records without id always sent
+        data[1]["v"] = "c"
+        changed, _ = sync.filter_changed(data, pending)
+        self.assertEqual(changed, data[1:])
+
+    def test_unchanged_records(self):
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                FakeClient.sent = []
+                FakeClient.records = [{"id": 1}, {"id": 2}]
+                sync = self.create_sync(
+                    fingerprint_field='id',
+                    streaming=streaming
+                )
+
+                sync.run(force=True)
+                FakeClient.records[1]["updated"] = "2021-01-03T10:00:00"
+                sync.run(force=True)
+                sync.run(force=True)
+
+                self.assertEqual(
+                    [[r.get("id") for r in sent] for sent in FakeClient.sent],
+                    [[1, 2], [2]]
+                )
+                self.assertEqual(sync.syncfingerprint_set.count(), 2)
+
+    def test_falsy_response(self):
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                FakeClient.sent = []
+                FakeClient.response = False
+                sync = self.create_sync(
+                    fingerprint_field='id',
+                    streaming=streaming
+                )
+
+                sync.run(force=True)
+                self.assertEqual(sync.syncfingerprint_set.count(), 0)
+
+                # sent again, saved when accepted
+                FakeClient.response = True
+                sync.run(force=True)
+                self.assertEqual(len(FakeClient.sent), 2)
+                self.assertEqual(sync.syncfingerprint_set.count(), 2)
+
+
+class SyncProcessTestCase(SyncTestCase):
+
+    def test_precompile_skips_broken_processes(self):
+        sync = self.create_sync()
+        ok = models.SyncProcess.objects.create(
+            sync=sync,
+            name='ok',
+            expression='def ok(data):\n    return data'
+        )
+        broken = models.SyncProcess.objects.create(
+            sync=sync,
+            name='broken',
+            expression='def broken(data):\n    return data +'
+        )
+
+        compiled, errors = models.SyncProcess.precompile()
+
+        self.assertEqual(compiled, 1)
+        self.assertEqual([e.get('process') for e in errors], [broken.pk])
+        self.assertIn(ok.get_key(), models.SyncProcess.methods)
+        with self.assertRaises(SyntaxError):
+            broken.execute([])
+
+
+class SyncRunningTestCase(SyncTestCase):
+
+    def test_reset_running(self):
+        running = self.create_sync(status='1')
+        pending = self.create_sync()
+        models.SyncHistory.objects.create(sync=running)
+
+        self.assertEqual(models.Sync.reset_running(), 1)
+
+        running.refresh_from_db()
+        self.assertEqual(running.status, '0')
+        history = running.synchistory_set.get()
+        self.assertFalse(history.ok)
+        self.assertIsNotNone(history.end_time)
+        self.assertEqual(models.Sync.reset_running(), 0)
+
+
+class ClaimTestCase(SyncTestCase):
+
+    def test_single_claim(self):
+        self.create_sync(status='2')
+        first, second = models.Sync.objects.get(), models.Sync.objects.get()
+
+        self.assertTrue(first.claim())
+        self.assertFalse(second.claim())
+        self.assertFalse(second.claim(force=True))
+        self.assertEqual(models.Sync.objects.get().status, '1')
+
+    def test_stale_claim(self):
+        sync = self.create_sync(status='2')
+        stale = models.Sync.objects.get()
+
+        # finished by another worker after the list was read
+        models.Sync.objects.filter(pk=sync.pk).update(
+            status='0',
+            next_run_at=timezone.now() + dt.timedelta(minutes=1)
+        )
+
+        self.assertFalse(stale.claim())
+        self.assertTrue(stale.claim(force=True))
+
+
+class KeyedExecutorTestCase(TestCase):
+
+    def test_busy_keys_are_queued(self):
+        release = threading.Event()
+        lock = threading.Lock()
+        running = {"A": 0}
+        max_running = {"A": 0}
+
+        def task_a(value):
+            with lock:
+                running["A"] += 1
+                max_running["A"] = max(max_running["A"], running["A"])
+            release.wait(5)
+            with lock:
+                running["A"] -= 1
+            return value
+
+        with concurrency.KeyedExecutor(workers=2, key_limit=1) as executor:
+            futures = [executor.submit("A", task_a, i) for i in range(3)]
+
+            # a free worker runs other keys while A is busy
+            other = executor.submit("B", lambda: "B")
+            self.assertEqual(other.result(timeout=5), "B")
+            self.assertFalse(any(future.done() for future in futures))
+
+            release.set()
+
+        self.assertEqual([future.result() for future in futures], [0, 1, 2])
+        self.assertEqual(max_running["A"], 1)
+
+    def test_errors(self):
+        with concurrency.KeyedExecutor(workers=1) as executor:
+            failed = executor.submit("A", lambda: 1 / 0)
+            ok = executor.submit("A", lambda: 1)
+
+        with self.assertRaises(ZeroDivisionError):
+            failed.result()
+        self.assertEqual(ok.result(), 1)
+
+
+class RetryTestCase(TestCase):
+
+    def failing(self, errors: list):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return len(calls)
+
+        return func, calls
+
+    def test_retry(self):
+        func, calls = self.failing([OSError("down"), OSError("down")])
+        self.assertEqual(concurrency.retry(func, backoff=0), 3)
+
+        func, calls = self.failing([OSError("down")] * 3)
+        with self.assertRaises(OSError):
+            concurrency.retry(func, backoff=0)
+        self.assertEqual(len(calls), 3)
+
+    def test_when(self):
+        # the predicate rejects the error, raised without retrying
+        func, calls = self.failing([OSError("sent")])
+        with self.assertRaises(OSError):
+            concurrency.retry(func, backoff=0, when=lambda error: False)
+        self.assertEqual(len(calls), 1)
+
+        func, calls = self.failing([OSError("not sent")])
+        self.assertEqual(
+            concurrency.retry(func, backoff=0, when=lambda error: True), 2
+        )
+
+    def test_not_sent(self):
+        refused = requests.exceptions.ConnectionError(MaxRetryError(
+            None, "/", NewConnectionError(None, "refused")
+        ))
+        self.assertTrue(visma.not_sent(refused))
+        self.assertTrue(visma.not_sent(requests.exceptions.ConnectTimeout()))
+        self.assertFalse(visma.not_sent(requests.exceptions.ReadTimeout()))
+        self.assertFalse(visma.not_sent(
+            requests.exceptions.ConnectionError("connection aborted")
+        ))
+
+
+class BisectTestCase(TestCase):
+
+    def post(self, values: list):
+        self.calls.append(list(values))
+        if "bad" in values:
+            raise ConnectionError("invalid value")
+        if "timeout" in values:
+            raise TimeoutError("timeout")
+        return len(values)
+
+    def setUp(self):
+        self.calls = []
+
+    def test_isolate(self):
+        errors = []
+        results = concurrency.bisect(
+            self.post, ["a", "bad", "c", "d", "bad"], errors
+        )
+
+        self.assertEqual(sum(results), 3)
+        self.assertEqual(
+            errors,
+            [{"element": "bad", "error": "invalid value"}] * 2
+        )
+
+    def test_failures(self):
+        errors = []
+        results = concurrency.bisect(
+            self.post,
+            ["a", "bad", "timeout", "d"],
+            errors,
+            failures=(TimeoutError,)
+        )
+
+        # the half with the timeout is not sent again
+        self.assertEqual(results, [1])
+        self.assertEqual(
+            [error.get('element') for error in errors],
+            ["bad", "timeout", "d"]
+        )
+        self.assertEqual(
+            self.calls,
+            [["a", "bad", "timeout", "d"], ["a", "bad"], ["a"], ["bad"],
+                ["timeout", "d"]]
+        )
+
+
+class ChunkStatsTestCase(TestCase):
+
+    def test_as_dict(self):
+        stats = concurrency.ChunkStats()
+        self.assertEqual(stats.as_dict().get('avg_latency'), None)
+
+        stats.add(size=10, seconds=0.5)
+        stats.add(size=4, seconds=1.5, failed=2)
+        totals = stats.as_dict()
+
+        self.assertEqual(totals.get('chunks'), 2)
+        self.assertEqual(totals.get('elements'), 14)
+        self.assertEqual(totals.get('failed'), 2)
+        self.assertEqual(totals.get('avg_latency'), 1.0)
+        self.assertEqual(totals.get('max_latency'), 1.5)
+        self.assertEqual(len(totals.get('detail')), 2)
+
+
+class FakeVisma:
+    """ spec_utils visma client that rejects some employees. """
+
+    def __init__(self, refused: int = 0):
+        self.refused = refused
+        self.calls = []
+
+    def post_pay_elements(self, values: list, **kwargs):
+        employees = [value.get('employeeExternalId') for value in values]
+        self.calls.append(employees)
+
+        # connection refused, the request never reached visma
+        if self.refused:
+            self.refused -= 1
+            raise requests.exceptions.ConnectTimeout()
+        if "timeout" in employees:
+            raise requests.exceptions.ReadTimeout()
+        if "bad" in employees:
+            raise ConnectionError('{"error": "invalid employee"}')
+        return True
+
+
+class VismaPaymentsTestCase(SyncTestCase):
+
+    sync_cfgs = {
+        "daily": {
+            "employee_field": "nif",
+            "concepts": {
+                "C1": {"result": "worked"},
+            }
+        }
+    }
+
+    def setUp(self):
+        destiny = models.Credential.objects.create(application='visma')
+        for key in ('host', 'user', 'password'):
+            destiny.credentialparameter_set.create(key=key, value=key)
+        self.connector = visma.Client(destiny, last_run=None)
+
+    def structure(self, *employees):
+        return [{
+            "sync_type": "daily",
+            "from": "2021-01-01",
+            "data": [{
+                "employee": {"nif": employee},
+                "totals": {"worked": 60}
+            } for employee in employees]
+        }]
+
+    def post(self, fake, *employees, **kwargs):
+        self.connector.connection = lambda **kw: contextlib.nullcontext(fake)
+        return self.connector.post_payments(
+            self.structure(*employees),
+            self.sync_cfgs,
+            backoff=0,
+            **kwargs
+        )
+
+    def test_retry_not_sent(self):
+        fake = FakeVisma(refused=1)
+        self.assertTrue(self.post(fake, "a", "b"))
+        self.assertEqual(fake.calls, [["a", "b"], ["a", "b"]])
+
+    def test_isolate_rejected(self):
+        fake = FakeVisma()
+        with self.assertRaises(concurrency.BatchError) as context:
+            self.post(fake, "a", "bad", "c", "d", chunk_size=2)
+
+        errors = context.exception.errors
+        self.assertEqual(
+            [error.get('element').get('employeeExternalId') \
+                for error in errors],
+            ["bad"]
+        )
+        self.assertEqual(
+            fake.calls,
+            [["a", "bad"], ["a"], ["bad"], ["c", "d"]]
+        )
+
+        # latency and failures of each chunk
+        stats = self.connector.stats.as_dict()
+        self.assertEqual(stats.get('chunks'), 2)
+        self.assertEqual(stats.get('elements'), 4)
+        self.assertEqual(stats.get('failed'), 1)
+
+    def test_timeouts_not_resent(self):
+        fake = FakeVisma()
+        with self.assertRaises(concurrency.BatchError) as context:
+            self.post(fake, "a", "timeout", "c")
+
+        # the chunk could have been saved, all its payments failed
+        self.assertEqual(len(context.exception.errors), 3)
+        self.assertEqual(fake.calls, [["a", "timeout", "c"]])
+
+
+class PaymentsPlanTestCase(TestCase):
+    """ ntRes_to_vismaPayments must return the same as the baseline loop. """
+
+    sync_cfgs = {
+        "daily": {
+            "concepts": {
+                "C1": {"result": "worked"},
+                "C2": {"result": "extra", "property": "hours"},
+                "C3": {
+                    "result": "absence",
+                    "property": "minutes",
+                    "parameter": 1,
+                    "zero_ignore": False
+                },
+            }
+        },
+        "monthly": {
+            "employee_field": "nif",
+            "concepts": {
+                "C4": {"result": "worked", "property": "seconds"},
+            }
+        }
+    }
+
+    syncs = [{
+        "sync_type": sync_type,
+        "from": "2021-01-01",
+        "data": [{
+            "employee": {"employeeCode": code, "nif": "N{}".format(code)},
+            "totals": {"worked": 30 * code, "extra": 95, "absence": 0}
+        } for code in range(3)]
+    } for sync_type in ("daily", "monthly")]
+
+    def baseline(self, syncs, sync_cfgs):
+        payments = []
+        for _sync in syncs:
+            sync_cfg = sync_cfgs.get(_sync.get('sync_type'))
+            for elem in _sync.get('data'):
+                for concept, cfg in sync_cfg.get('concepts').items():
+                    ntv = elem.get('totals').get(cfg.get('result'))
+                    if not ntv and cfg.get('zero_ignore', True):
+                        continue
+
+                    payments.append({
+                        "employeeExternalId": elem.get('employee').get(
+                            sync_cfg.get('employee_field', 'employeeCode')
+                        ),
+                        "periodFrom": _sync.get('from'),
+                        "periodTo": _sync.get('from'),
+                        "reason": "",
+                        "reasonTypeExternalId": "",
+                        "action": 0,
+                        "retroactive": False,
+                        "conceptExternalId": concept,
+                        "parameterId": cfg.get('parameter', 3),
+                        "value": getattr(
+                            api.NetTimeResult(value=ntv),
+                            cfg.get('property', 'centesimal_time')
+                        )
+                    })
+        return payments
+
+    def test_parity(self):
+        payments = api.ntRes_to_vismaPayments(self.syncs, self.sync_cfgs)
+
+        self.assertEqual(payments, self.baseline(self.syncs, self.sync_cfgs))
+        self.assertEqual(
+            list(api.iter_ntRes_to_vismaPayments(self.syncs, self.sync_cfgs)),
+            payments
+        )
+
+        # copies of the templates, not shared dicts
+        self.assertEqual(len({id(payment) for payment in payments}),
+            len(payments))
+
+
+class StreamingResultsTestCase(TestCase):
+
+    def setUp(self):
+        source = models.Credential.objects.create(application='specmanager')
+        for key in ('server', 'user', 'password', 'database', 'controller'):
+            source.credentialparameter_set.create(key=key, value=key)
+        self.connector = specmanagerdb.Client(source, last_run=None)
+        self.connector.iter_rows = lambda query, fetch_size: iter([
+            [{"id": 1, "value": "a"}, {"id": 2, "value": "b"}],
+            [{"id": 3, "value": "c"}],
+        ])
+
+    def read(self, **kwargs):
+        return list(self.connector.iter_results(
+            fields=[], from_table="RESULTS", marc_col="MARC", **kwargs
+        ))
+
+    def test_keys(self):
+        self.assertEqual(len(self.read(key_col="id")), 3)
+        self.assertEqual(
+            self.connector.pending_marks,
+            {("RESULTS", "MARC", "id"): [1, 2, 3]}
+        )
+
+    def test_without_key_col(self):
+        # rows can't be marked, but the sync keeps reading them
+        with self.assertWarns(RuntimeWarning):
+            self.assertEqual(len(self.read()), 3)
+        self.assertFalse(any(self.connector.pending_marks.values()))
+        self.assertEqual(self.connector.mark_delivered(), 0)
+
+
+class CredentialParamsTestCase(TestCase):
+
+    def test_missing_param(self):
+        credential = models.Credential.objects.create(application='visma')
+        credential.credentialparameter_set.create(key='host', value='host')
+
+        with self.assertRaisesMessage(models.MissingParameter, '"user"'):
+            visma.Client(credential, last_run=None)
+
+        params = credential.get_params()
+        self.assertEqual(params.host, 'host')
+        self.assertIsNone(getattr(params, 'port', None))
 
-# Create your tests here.
+        # a param added later is read (cache invalidated)
+        credential.credentialparameter_set.create(key='user', value='user')
+        self.assertEqual(credential.get_params().user, 'user')
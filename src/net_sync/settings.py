@@ -175,6 +175,7 @@ CONNECTORS = {
             'manager_api': {
                 'class_': 'specmanagerapi.Client',  # is connector
                 'method': 'get_clockings',
+                'stream': 'iter_clockings',     # optional generator method
             }
         },
         'to': {
@@ -193,6 +194,7 @@ CONNECTORS = {
             'manager': {
                 'class_': 'specmanagerdb.Client',
                 'method': 'get_employees',
+                'stream': 'iter_employees',
             },
             'visma': {
                 'class_': 'visma.Client',
@@ -205,6 +207,7 @@ CONNECTORS = {
             'certronic': {
                 'class_': 'certronic.Client',
                 'method': 'get_employees',
+                'stream': 'iter_employees',
             },
         },
         'to': {
@@ -227,6 +230,7 @@ CONNECTORS = {
             'manager': {
                 'class_': 'specmanagerdb.Client',
                 'method': 'get_employees',
+                'stream': 'iter_employees',
             }
         },
         'to': {
@@ -245,6 +249,7 @@ CONNECTORS = {
             'manager': {
                 'class_': 'specmanagerdb.Client',
                 'method': 'get_results',
+                'stream': 'iter_results',
             }
         },
         'to': {
@@ -280,3 +285,30 @@ LOG_AUTOCLEAN = USER_SETTINGS.get('LOG_AUTOCLEAN', False)
 # days offset to delete from synchistory
 # needs LOG_AUTOCLEAN = True
 LOG_AUTOCLEAN_DAYS = USER_SETTINGS.get('LOG_AUTOCLEAN_DAYS', 10)
+
+# max rows deleted from synchistory in each statement
+LOG_AUTOCLEAN_BATCH_SIZE = USER_SETTINGS.get('LOG_AUTOCLEAN_BATCH_SIZE', 1000)
+
+# seconds to wait between deletion batches
+LOG_AUTOCLEAN_PAUSE = USER_SETTINGS.get('LOG_AUTOCLEAN_PAUSE', 0)
+
+# seconds before the sync watermark to get data again in each run, to
+# include source records saved late or with a clock offset
+SYNC_WATERMARK_OVERLAP = USER_SETTINGS.get('SYNC_WATERMARK_OVERLAP', 300)
+
+# max number of elements sent to the target on each call of streaming syncs
+SYNC_CHUNK_SIZE = USER_SETTINGS.get('SYNC_CHUNK_SIZE', 1000)
+
+# seconds to reuse an open connector client (login, token, etc)
+CONNECTIONS_TTL = USER_SETTINGS.get('CONNECTIONS_TTL', 300)
+
+# seconds to reuse cached credential params in other processes
+# (changes in the same process are applied immediately)
+CREDENTIALS_TTL = USER_SETTINGS.get('CREDENTIALS_TTL', 60)
+
+# max number of syncs with the same target running in parallel
+# used with run_syncs --workers
+SYNC_DESTINY_WORKERS = USER_SETTINGS.get('SYNC_DESTINY_WORKERS', 1)
+
+# max number of parsed date strings cached by processors (0 to disable)
+DATES_CACHE_SIZE = USER_SETTINGS.get('DATES_CACHE_SIZE', 4096)
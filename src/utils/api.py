@@ -2,6 +2,7 @@
 
 ### built-in ###
 import json
+import functools
 import datetime as dt
 
 ### django ###
@@ -10,6 +11,9 @@ import datetime as dt
 ### own ###
 from utils import processors as procs
 
+### third ###
+import pandas as pd
+
 class NetTimeResult:
     """ Class to process formats from nettime result value. """
 
@@ -26,26 +30,55 @@ class NetTimeResult:
     def hours(self):
         """ Return the number of hours assuming that is a time format. """
 
-        return int(self.value // 60)
+        return self.to_hours(self.value)
 
     @property
     def minutes(self):
         """ Return the number of minutes assuming that is a time format. """
 
-        return int(self.value)
+        return self.to_minutes(self.value)
 
     @property
     def seconds(self):
         """ Return the number of seconds assuming that is a time format. """
 
-        return int(self.value * 60)
+        return self.to_seconds(self.value)
 
     @property
     def centesimal_time(self):
         """ Return time centesimal format assuming that is a time format. """
 
-        dif = self.minutes - self.hours * 60
-        return float('{:.2f}'.format(self.hours + dif / 60))
+        return self.to_centesimal_time(self.value)
+
+    ### converters of raw values, used by the properties and payment plans
+    @staticmethod
+    def to_hours(value):
+        return int(value // 60)
+
+    @staticmethod
+    def to_minutes(value):
+        return int(value)
+
+    @staticmethod
+    def to_seconds(value):
+        return int(value * 60)
+
+    @staticmethod
+    def to_centesimal_time(value):
+        hours = int(value // 60)
+        dif = int(value) - hours * 60
+        return float('{:.2f}'.format(hours + dif / 60))
+
+    @classmethod
+    def get_converter(cls, prop: str):
+        """ Return a function that converts a raw value to the property. """
+
+        converter = getattr(cls, f'to_{prop}', None)
+        if converter:
+            return converter
+
+        # other properties through an instance
+        return lambda value: getattr(cls(value=value), prop)
 
     def __repr__(self):
         return '{}(value={})'.format(self.__class__.__name__, self.value)
@@ -212,68 +245,564 @@ def apply_fields_def(structure: list, fields_def: list):
 
     return out_data
 
-def ntRes_to_vismaPayments(self, syncs: list, sync_cfgs: dict, **kwargs):
+class FieldsPlan:
     """
-    Prepare visma payments request from nettime results.
+    Compiled version of a list of api.FieldDefinition elements.
+    Processor methods and their parameters are resolved once, so the plan can
+    be applied to many elements without re-interpreting the definitions.
+    """
+
+    def __init__(self, fields_def: list):
+        self.fields_def = fields_def
+        self._fields = tuple(self.compile_field(fd) for fd in fields_def)
+        self._vectorized = tuple(
+            self.compile_vectorized(fd) for fd in fields_def
+        )
+
+    def __repr__(self):
+        return '{}(fields_def={})'.format(
+            self.__class__.__name__,
+            self.fields_def
+        )
+
+    def __call__(self, structure):
+        return self.apply(structure)
+
+    @property
+    def vectorized(self) -> bool:
+        """ True if any field can be processed with vectorized steps. """
+
+        return any(vsteps for vsteps in self._vectorized)
+
+    @staticmethod
+    def compile_field(fd):
+        """ Return a tuple with field names, default and bound steps. """
+
+        return (
+            fd.out_name,
+            fd.in_name,
+            getattr(fd, 'default', None),
+            tuple(
+                (getattr(procs, step.method), step._args, step._kwargs)
+                for step in fd.steps
+            )
+        )
+
+    @staticmethod
+    def compile_vectorized(fd):
+        """
+        Return a tuple with the vectorized variant of each step or None if
+        any step doesn't have one (the field will be processed row-wise).
+        """
+
+        steps = tuple(procs.VECTORIZED.get(step.method) for step in fd.steps)
+        return None if None in steps else steps
+
+    @classmethod
+    def from_json(cls, fields: list):
+        """
+        Return a cached FieldsPlan for the "fields" json definitions.
+
+        @@ Parameters
+        @fields (list):
+            List of dict (or str) compatible with FieldDefinition.from_json.
+
+        @@ Returns
+        @FieldsPlan : Compiled (and cached) instance of FieldsPlan.
+        """
+
+        try:
+            fields_key = json.dumps(fields, sort_keys=True)
+        except (TypeError, ValueError):
+            fields_key = None
+
+        # only json definitions are cached, other python objects (int keys,
+        # dates, tuples...) would change with the dump, compile them as is
+        if fields_key is None or json.loads(fields_key) != fields:
+            return cls([FieldDefinition.from_json(f) for f in fields])
+
+        return _get_fields_plan(fields_key)
+
+    def apply_one(self, elem: dict):
+        """ Apply the compiled field definition to a single element. """
+
+        _structure = {}
+        for out_name, in_name, default, steps in self._fields:
+            # get first value
+            value = elem.get(in_name, None)
+
+            # execute all steps of definition -if exist-
+            for method, _args, _kwargs in steps:
+                # for null values
+                if not value:
+                    break
+                value = method(value, *_args, **_kwargs)
+
+            # insert in _structure if has value or default
+            if value:
+                _structure[out_name] = value
+            elif default:
+                _structure[out_name] = default
+
+        return _structure
+
+    def apply(self, structure):
+        """ Apply the compiled field definition to all structure elements. """
+
+        apply_one = self.apply_one
+        return [apply_one(elem) for elem in structure]
+
+    def iter_apply(self, structure):
+        """ Lazy version of apply, yields the processed elements. """
+
+        apply_one = self.apply_one
+        for elem in structure:
+            yield apply_one(elem)
+
+    @staticmethod
+    def get_column(structure, in_name: str) -> list:
+        """ Return the in_name values of a list of dict or a DataFrame. """
+
+        if isinstance(structure, pd.DataFrame):
+            if in_name not in structure.columns:
+                return [None] * len(structure)
+            column = structure[in_name].astype(object)
+            return column.where(column.notna(), None).tolist()
+
+        return [elem.get(in_name, None) for elem in structure]
+
+    def apply_column(self, values: list, steps: tuple, vsteps: tuple):
+        """
+        Execute the steps over a column of values. Falsy values are not
+        processed by the next steps, same as apply_one.
+        """
+
+        values = list(values)
+        for (method, _args, _kwargs), vmethod in zip(steps, vsteps or steps):
+            # positions with values to process
+            index = [i for i, value in enumerate(values) if value]
+            if not index:
+                break
+
+            results = None
+            if vsteps:
+                results = vmethod(
+                    pd.Series([values[i] for i in index], dtype=object),
+                    *_args,
+                    **_kwargs
+                )
+
+            # row-wise fallback
+            if results is None:
+                results = [method(values[i], *_args, **_kwargs) for i in index]
+            else:
+                results = results.tolist()
+
+            for i, value in zip(index, results):
+                values[i] = value
+
+        return values
+
+    def apply_columnar(self, structure):
+        """
+        Columnar version of apply. Each field is processed as a column, with
+        the vectorized variants of the processors if all steps of the field
+        have one (row-wise otherwise).
+
+        @@ Parameters
+        @structure (list or pd.DataFrame):
+            List of dict or DataFrame with the elements to process.
+
+        @@ Returns
+        @list: List or result elements, same as apply.
+        """
+
+        if not isinstance(structure, pd.DataFrame):
+            structure = list(structure)
+
+        columns = []
+        for (out_name, in_name, default, steps), vsteps in zip(
+                self._fields, self._vectorized):
+            values = self.apply_column(
+                self.get_column(structure, in_name),
+                steps,
+                vsteps
+            )
+            columns.append((out_name, default, values))
+
+        out = []
+        for i in range(len(structure)):
+            _structure = {}
+            for out_name, default, values in columns:
+                # insert in _structure if has value or default
+                if values[i]:
+                    _structure[out_name] = values[i]
+                elif default:
+                    _structure[out_name] = default
+            out.append(_structure)
+
+        return out
+
+
+@functools.lru_cache(maxsize=128)
+def _get_fields_plan(fields_key: str):
+    """
+    Compile a FieldsPlan from a json dumped list of field definitions. The
+    key is only used for definitions that are equal after the dump.
+    """
+
+    return FieldsPlan(
+        [FieldDefinition.from_json(f) for f in json.loads(fields_key)]
+    )
+
+def apply_fields_plan(structure: list, fields: list):
+    """
+    Same as apply_fields_def, but receives the json field definitions and
+    uses a compiled (and cached) FieldsPlan to process the structure.
 
     @@ Parameters
-    @syncs (list):
-        List of sync results from nettime (self.get_nt6_result_syncs).
-    @sync_cfgs (dict):
-        Dict with config to apply to syncs. Must include sync_type,
-        employee_field, and concepts dict. Check docs for +info.
+    @structure (list):
+        JSON structure where each element is a key:value pair dictionary.
+    @fields (list):
+        List of dict (or str) compatible with FieldDefinition.from_json.
 
     @@ Returns
-    @list: List of payment elements to send to Visma.
+    @list: List or result elements
+    """
+
+    return FieldsPlan.from_json(fields).apply(structure)
+
+def apply_fields_columnar(structure, fields: list):
+    """
+    Columnar version of apply_fields_plan. Fields are processed as columns
+    with the vectorized processors, with the same result. Lists are
+    processed row-wise if no field has vectorized processors.
+
+    @@ Parameters
+    @structure (list or pd.DataFrame):
+        JSON structure where each element is a key:value pair dictionary, or
+        DataFrame with the same elements.
+    @fields (list):
+        List of dict (or str) compatible with FieldDefinition.from_json.
+
+    @@ Returns
+    @list: List or result elements
+    """
+
+    plan = FieldsPlan.from_json(fields)
+    if plan.vectorized or isinstance(structure, pd.DataFrame):
+        return plan.apply_columnar(structure)
+
+    return plan.apply(structure)
+
+def chunked(iterable, size: int):
+    """
+    Group the elements of an iterable (list, generator, etc) in lists of
+    "size" elements. The last list can contain fewer elements.
+
+    @@ Parameters
+    @iterable (iterable):
+        Elements to group.
+    @size (int):
+        Max number of elements of each chunk.
+
+    @@ Returns
+    @generator: Generator of lists.
+    """
+
+    chunk = []
+    for elem in iterable:
+        chunk.append(elem)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    # remaining elements
+    if chunk:
+        yield chunk
+
+def records_to_frame(structure) -> pd.DataFrame:
+    """ Convert a list (or iterable) of dict to a pandas DataFrame. """
+
+    return pd.DataFrame.from_records(list(structure))
+
+def frame_to_records(frame: pd.DataFrame) -> list:
+    """
+    Convert a pandas DataFrame to a list of dict with python values.
+    Null values (NaN, NaT) are converted to None.
+    """
+
+    # python objects instead of numpy types
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+# DataFrame.to_dict orientations supported by frame_to_dict
+FRAME_ORIENTS = ('dict', 'list', 'split', 'tight', 'records', 'index')
+
+def _infer_string() -> bool:
+    """ True if pandas types str columns as str (pandas 3), not object. """
+
+    try:
+        return bool(pd.get_option('future.infer_string'))
+    except KeyError:
+        # option not registered (pandas < 2.1)
+        return False
+
+def _column_kind(values) -> str:
+    """
+    Return the pandas-like type (int, float, bool, str, object) of a column.
+    """
+
+    kinds = set()
+    for value in values:
+        if value is None:
+            kinds.add('none')
+        elif isinstance(value, bool):
+            kinds.add('bool')
+        elif isinstance(value, int):
+            kinds.add('int')
+        elif isinstance(value, float):
+            kinds.add('float')
+        elif isinstance(value, str):
+            kinds.add('str')
+        else:
+            return 'object'
+
+    if kinds in ({'int'}, {'bool'}):
+        return kinds.pop()
+
+    # numbers with nulls are float (NaN)
+    if kinds & {'int', 'float'} and kinds <= {'int', 'float', 'none'}:
+        return 'float'
+
+    # str with nulls are str (NaN) if pandas infers str columns
+    if 'str' in kinds and kinds <= {'str', 'none'} and _infer_string():
+        return 'str'
+
+    return 'object'
+
+def _coerce_column(values, kind: str) -> list:
+    """
+    Convert the values of a column to its kind (float and NaN, or str and
+    NaN only).
+    """
+
+    if kind == 'float':
+        return [float('nan') if v is None else float(v) for v in values]
+
+    if kind == 'str':
+        return [float('nan') if v is None else v for v in values]
+
+    return list(values)
+
+def frame_to_dict(data: list, columns: list, index: list, \
+        orient: str = 'dict', transpose: bool = False):
+    """
+    Same result of pd.DataFrame(data, columns, index).to_dict(orient)
+    (transposed before if transpose*) built with plain lists and dicts.
+    Columns are typed like pandas does: ints, floats (int and null values
+    are converted to float and NaN), bools and str (null values are NaN
+    with pandas 3). Other columns are returned without changes.
+
+    @@ Parameters
+    @data (list):
+        List of rows, each one with a value for each column.
+    @columns (list):
+        Column labels.
+    @index (list):
+        Row labels.
+    @orient (str):
+        One of FRAME_ORIENTS. 'dict' by default.
+    @transpose (bool):
+        Swap rows and columns before the conversion.
+
+    @@ Returns
+    @dict or list: Same structure of DataFrame.to_dict.
+    """
+
+    if orient not in FRAME_ORIENTS:
+        raise ValueError(f"orient '{orient}' not understood")
+
+    rows = [list(row) for row in data]
+    for row in rows:
+        if len(row) != len(columns):
+            raise ValueError(
+                f'{len(columns)} columns passed, passed data had '
+                f'{len(row)} columns'
+            )
+    if len(rows) != len(index):
+        raise ValueError(
+            f'Length of values ({len(rows)}) does not match length of '
+            f'index ({len(index)})'
+        )
+
+    # type each column
+    cols = [list(col) for col in zip(*rows)] if rows else \
+        [[] for _ in columns]
+    kinds = [_column_kind(col) for col in cols]
+
+    # transposed columns share a single type: float if int and float
+    # columns are mixed, object (values without changes) otherwise
+    if transpose and set(kinds) == {'int', 'float'}:
+        kinds = ['float'] * len(kinds)
+
+    cols = [_coerce_column(col, kind) for col, kind in zip(cols, kinds)]
+    rows = [list(row) for row in zip(*cols)] if cols else \
+        [[] for _ in index]
+
+    # labels and values by row and by column of the output frame
+    if transpose:
+        row_labels, col_labels, by_row, by_col = columns, index, cols, rows
+    else:
+        row_labels, col_labels, by_row, by_col = index, columns, rows, cols
+
+    if orient == 'dict':
+        return {
+            c: dict(zip(row_labels, col)) for c, col in zip(col_labels, by_col)
+        }
+
+    if orient == 'list':
+        return {c: col for c, col in zip(col_labels, by_col)}
+
+    if orient == 'index':
+        if len(set(row_labels)) != len(row_labels):
+            raise ValueError(
+                "DataFrame index must be unique for orient='index'."
+            )
+        return {
+            r: dict(zip(col_labels, row)) for r, row in zip(row_labels, by_row)
+        }
+
+    # like pandas, rows without columns are not included
+    if not col_labels:
+        by_row = []
+
+    if orient == 'records':
+        return [dict(zip(col_labels, row)) for row in by_row]
+
+    # split and tight
+    out = {
+        "index": list(row_labels),
+        "columns": list(col_labels),
+        "data": by_row
+    }
+    if orient == 'tight':
+        out["index_names"] = [None]
+        out["column_names"] = [None]
+
+    return out
+
+def get_payments_plan(sync_cfg: dict) -> tuple:
+    """
+    Resolve the config of a sync type once for ntRes_to_vismaPayments.
+
+    @@ Parameters
+    @sync_cfg (dict):
+        Config of a sync_type, with employee_field and concepts dict.
+
+    @@ Returns
+    @tuple: Employee field and tuple of concepts, each one with
+        (concept, result, zero_ignore, parameter, converter).
+    """
+
+    concepts = tuple(
+        (
+            concept,
+            cfg.get('result'),
+            cfg.get('zero_ignore', True),
+            cfg.get('parameter', 3),
+            NetTimeResult.get_converter(
+                cfg.get('property', 'centesimal_time')
+            )
+        ) for concept, cfg in sync_cfg.get('concepts').items()
+    )
+
+    return sync_cfg.get('employee_field', 'employeeCode'), concepts
+
+def iter_ntRes_to_vismaPayments(syncs, sync_cfgs: dict, **kwargs):
+    """
+    Lazy version of ntRes_to_vismaPayments, yields the payment elements.
+    The config of each sync type is resolved once (get_payments_plan) and
+    the payments of each concept are copied from a template.
     """
 
-    # out structure
-    all_payments = []
+    # plans by sync_type
+    plans = {}
 
     # all syncs recived
     for _sync in syncs:
+        sync_type = _sync.get('sync_type')
+        templates = None
+
         # all data* elements
         for elem in _sync.get('data'):
+            if templates is None:
+                if sync_type not in plans:
+                    plans[sync_type] = get_payments_plan(
+                        sync_cfgs.get(sync_type)
+                    )
+                employee_field, concepts = plans[sync_type]
+
+                # payment structure of each concept for this sync
+                templates = [(
+                    result,
+                    zero_ignore,
+                    convert,
+                    {
+                        "employeeExternalId": None,
+                        "periodFrom": _sync.get('from'),
+                        "periodTo": _sync.get('from'),
+                        "reason": "",
+                        "reasonTypeExternalId": "",
+                        "action": 0,
+                        "retroactive": False,
+                        # "journalModelId": 0,
+                        # "journalModelStructureId1": 0,
+                        # "journalModelStructureId2": 0,
+                        # "journalModelStructureId3": 0,
+                        "conceptExternalId": concept,
+                        "parameterId": parameter,
+                        #"dateFrom": "",
+                        #"dateTo": "",
+                        "value": None
+                    }
+                ) for concept, result, zero_ignore, parameter, convert \
+                    in concepts]
+
+            totals = elem.get('totals')
+
             # all concepts of config
-            for concept, cfg in sync_cfgs.get(
-                    _sync.get('sync_type')).get('concepts').items():
+            for result, zero_ignore, convert, template in templates:
 
                 # total value of current concept
-                ntv = elem.get('totals').get(cfg.get('result'))
+                ntv = totals.get(result)
 
                 # ignore next steps if is 0
-                if not ntv and cfg.get('zero_ignore', True):
+                if not ntv and zero_ignore:
                     continue
 
                 # if ntv != 0
-                structure = {
-                    "employeeExternalId": elem.get('employee').get(
-                        sync_cfgs.get(
-                            _sync.get('sync_type')
-                        ).get('employee_field', 'employeeCode')
-                    ),
-                    "periodFrom": _sync.get('from'),
-                    "periodTo": _sync.get('from'),
-                    "reason": "",
-                    "reasonTypeExternalId": "",
-                    "action": 0,
-                    "retroactive": False,
-                    # "journalModelId": 0,
-                    # "journalModelStructureId1": 0,
-                    # "journalModelStructureId2": 0,
-                    # "journalModelStructureId3": 0,
-                    "conceptExternalId": concept,
-                    "parameterId": cfg.get('parameter', 3),
-                    #"dateFrom": "",
-                    #"dateTo": "",
-                    "value": getattr(
-                        NetTimeResult(value=ntv),
-                        cfg.get('property', 'centesimal_time')
-                    )
-                }
+                structure = template.copy()
+                structure["employeeExternalId"] = elem.get('employee').get(
+                    employee_field
+                )
+                structure["value"] = convert(ntv)
+
+                yield structure
+
+def ntRes_to_vismaPayments(syncs: list, sync_cfgs: dict, **kwargs):
+    """
+    Prepare visma payments request from nettime results.
 
-                # append structure to out elements
-                all_payments.append(structure)
+    @@ Parameters
+    @syncs (list):
+        List of sync results from nettime (self.get_nt6_result_syncs).
+    @sync_cfgs (dict):
+        Dict with config to apply to syncs. Must include sync_type,
+        employee_field, and concepts dict. Check docs for +info.
+
+    @@ Returns
+    @list: List of payment elements to send to Visma.
+    """
 
-    # return structure
-    return all_payments
+    return list(iter_ntRes_to_vismaPayments(syncs, sync_cfgs, **kwargs))
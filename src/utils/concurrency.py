@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+
+### built-in ###
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+### django ###
+# ...
+
+### own ###
+# ...
+
+
+class BatchError(Exception):
+    """ Raised when one or more elements of a batch process failed. """
+
+    def __init__(self, errors: list, total: int):
+        self.errors = errors
+        self.total = total
+        super().__init__(self.summary())
+
+    def summary(self, max_errors: int = 10):
+        """ Return a str with the number of failures and first errors. """
+
+        lines = ['{} of {} elements failed.'.format(
+            len(self.errors),
+            self.total
+        )]
+        lines.extend(
+            '{}: {}'.format(error.get('element'), error.get('error')) \
+                for error in self.errors[:max_errors]
+        )
+        if len(self.errors) > max_errors:
+            lines.append('...')
+
+        return '\n'.join(lines)
+
+
+class RateLimiter:
+    """
+    Thread safe limiter that allows at most "rate" calls per second.
+    None or 0 rate means no limit.
+    """
+
+    def __init__(self, rate: float = None):
+        self.interval = 1 / rate if rate else 0
+        self.next_call = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """ Block until the next call is allowed. """
+
+        if not self.interval:
+            return
+
+        with self.lock:
+            current = time.monotonic()
+            wait = self.next_call - current
+            self.next_call = max(self.next_call, current) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ChunkStats:
+    """
+    Thread safe record of the latency of each processed chunk, with the
+    throughput of the whole process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.chunks = []
+
+    def __repr__(self):
+        return '{}(chunks={})'.format(self.__class__.__name__, len(self.chunks))
+
+    def add(self, size: int, seconds: float, failed: int = 0):
+        """ Record a chunk of "size" elements processed in "seconds". """
+
+        with self.lock:
+            self.chunks.append({
+                "size": size,
+                "seconds": round(seconds, 3),
+                "failed": failed
+            })
+
+    def as_dict(self) -> dict:
+        """ Return totals and chunks detail (json serializable). """
+
+        elapsed = time.monotonic() - self.started
+        with self.lock:
+            chunks = list(self.chunks)
+
+        elements = sum(chunk.get('size') for chunk in chunks)
+        latencies = [chunk.get('seconds') for chunk in chunks]
+
+        return {
+            "chunks": len(chunks),
+            "elements": elements,
+            "failed": sum(chunk.get('failed') for chunk in chunks),
+            "seconds": round(elapsed, 3),
+            "throughput": round(elements / elapsed, 1) if elapsed else None,
+            "avg_latency": round(sum(latencies) / len(latencies), 3) \
+                if latencies else None,
+            "max_latency": max(latencies) if latencies else None,
+            "detail": chunks
+        }
+
+
+class KeyedExecutor:
+    """
+    Thread pool with a max number of parallel tasks per key. Tasks over the
+    limit of their key wait in a queue, without taking a worker, and run
+    when a task of the same key ends.
+    """
+
+    def __init__(self, workers: int = 1, key_limit: int = 1):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.key_limit = key_limit
+        self.lock = threading.Lock()
+        # key: number of running tasks and queue of waiting tasks
+        self.running = {}
+        self.waiting = {}
+
+    def __repr__(self):
+        return '{}(running={}, waiting={})'.format(
+            self.__class__.__name__,
+            sum(self.running.values()),
+            sum(len(queue) for queue in self.waiting.values())
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def submit(self, key, func, *args, **kwargs) -> Future:
+        """ Schedule func(*args, **kwargs) and return its Future. """
+
+        future = Future()
+        task = (future, func, args, kwargs)
+
+        with self.lock:
+            if self.running.get(key, 0) >= self.key_limit:
+                self.waiting.setdefault(key, deque()).append(task)
+                return future
+
+            self.running[key] = self.running.get(key, 0) + 1
+
+        self.pool.submit(self.run, key, task)
+        return future
+
+    def run(self, key, task):
+        """ Execute task and the waiting tasks of key in the same worker. """
+
+        while task:
+            future, func, args, kwargs = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as error:
+                    future.set_exception(error)
+
+            # next task of the same key
+            with self.lock:
+                queue = self.waiting.get(key)
+                task = queue.popleft() if queue else None
+                if not task:
+                    self.running[key] -= 1
+
+    def shutdown(self, wait: bool = True):
+        """ Shutdown the pool, waiting tasks are executed before it ends. """
+
+        self.pool.shutdown(wait=wait)
+
+
+def retry(func, *args, attempts: int = 3, backoff: float = 1, \
+        exceptions: tuple = (OSError,), when=None, **kwargs):
+    """
+    Execute func with args and kwargs, retrying with exponential backoff if
+    it raises one of exceptions*.
+
+    @@ Parameters
+    @func (callable):
+        Method to execute.
+    @attempts (int):
+        Max number of executions. 3 by default.
+    @backoff (float):
+        Seconds to wait before the first retry. Doubled on each retry.
+    @exceptions (tuple):
+        Exceptions that must be retried. OSError by default (includes
+        ConnectionError and requests exceptions).
+    @when (callable):
+        Optional method that receives the raised exception and returns False
+        if it must not be retried (eg. requests that could have been saved).
+
+    @@ Returns
+    @any: Result of func.
+    """
+
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except exceptions as error:
+            # last attempt or not retriable error
+            if attempt >= attempts - 1 or (when and not when(error)):
+                raise
+
+            time.sleep(backoff * 2 ** attempt)
+
+
+def bisect(func, elements: list, errors: list, \
+        exceptions: tuple = (ConnectionError,), failures: tuple = ()) -> list:
+    """
+    Execute func with the list of elements. If it raises one of
+    exceptions*, execute it again with each half of elements (recursively)
+    to isolate the elements that fail.
+
+    @@ Parameters
+    @func (callable):
+        Method that receives a list of elements.
+    @elements (list):
+        Elements to process.
+    @errors (list):
+        List where dict errors with 'element' and 'error' keys are appended
+        for each failed element.
+    @exceptions (tuple):
+        Exceptions caused by the elements. ConnectionError by default
+        (raised by spec_utils clients with the error of the api).
+    @failures (tuple):
+        Exceptions that mark all the elements as failed without sending them
+        again (eg. timeouts, the elements could have been saved).
+
+    @@ Returns
+    @list: List of results of the successful calls.
+    """
+
+    try:
+        return [func(elements)]
+    except failures as error:
+        errors.extend(
+            {"element": element, "error": str(error)} for element in elements
+        )
+        return []
+    except exceptions as error:
+        if len(elements) <= 1:
+            errors.extend(
+                {"element": element, "error": str(error)} \
+                    for element in elements
+            )
+            return []
+
+    middle = len(elements) // 2
+    return bisect(func, elements[:middle], errors, exceptions, failures) + \
+        bisect(func, elements[middle:], errors, exceptions, failures)
+
+
+def bounded_map(func, elements, workers: int = 1):
+    """
+    Execute func with each element and return the results in the same order
+    of elements. At most "workers" calls are executed at the same time.
+
+    @@ Parameters
+    @func (callable):
+        Method to execute with each element.
+    @elements (iterable):
+        Elements to process.
+    @workers (int):
+        Max number of parallel calls. 1 (sequential) by default.
+
+    @@ Returns
+    @list: List of results.
+    """
+
+    if workers <= 1:
+        return [func(element) for element in elements]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, elements))
+
+
+def ordered_imap(func, elements, workers: int = 1):
+    """
+    Lazy version of bounded_map. Yields the results in the same order of
+    elements, keeping at most workers * 2 calls pending (or waiting to be
+    consumed) at the same time.
+
+    @@ Parameters
+    @func (callable):
+        Method to execute with each element.
+    @elements (iterable):
+        Elements to process.
+    @workers (int):
+        Max number of parallel calls. 1 (sequential) by default.
+
+    @@ Returns
+    @generator: Generator of results.
+    """
+
+    if workers <= 1:
+        for element in elements:
+            yield func(element)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for element in elements:
+            pending.append(pool.submit(func, element))
+
+            # wait for the oldest call
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def collect_errors(func, elements: list, workers: int = 1, \
+        rate_limit: float = None):
+    """
+    Same as bounded_map, but errors are collected per element instead of
+    stopping the process.
+
+    @@ Parameters
+    @func (callable):
+        Method to execute with each element.
+    @elements (list):
+        Elements to process.
+    @workers (int):
+        Max number of parallel calls. 1 (sequential) by default.
+    @rate_limit (float):
+        Max calls per second. None (no limit) by default.
+
+    @@ Returns
+    @tuple: List of results (None if failed) and list of dict errors with
+        'element' and 'error' keys.
+    """
+
+    limiter = RateLimiter(rate_limit)
+    errors = []
+
+    def call(element):
+        limiter.wait()
+        try:
+            return func(element)
+        except Exception as error:
+            errors.append({"element": element, "error": str(error)})
+            return None
+
+    return bounded_map(call, elements, workers=workers), errors
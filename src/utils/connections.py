@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+### built-in ###
+from contextlib import contextmanager
+import atexit
+import threading
+import time
+
+### django ###
+from django.conf import settings
+
+### own ###
+# ...
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of open spec_utils clients, keyed by credential.
+    Each client is used by one connector call at a time and reused by the
+    next calls until it expires (ttl) or fails its health check.
+    """
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # key: list of [client, expires]
+        self.idle = {}
+
+    def __repr__(self):
+        return '{}(ttl={}, idle={})'.format(
+            self.__class__.__name__,
+            self.ttl,
+            sum(len(clients) for clients in self.idle.values())
+        )
+
+    @staticmethod
+    def is_healthy(client):
+        """ Check the client state if it informs it. """
+
+        return bool(getattr(client, 'is_connected', True))
+
+    @staticmethod
+    def close(client):
+        """ Close (disconnect) the client ignoring errors. """
+
+        try:
+            client.__exit__(None, None, None)
+        except Exception:
+            pass
+
+    def acquire(self, key, factory):
+        """ Get an idle healthy client for key or create a new one. """
+
+        current = time.monotonic()
+        expired = []
+        client = None
+
+        with self.lock:
+            clients = self.idle.get(key, [])
+            while clients:
+                _client, expires = clients.pop()
+                if expires > current and self.is_healthy(_client):
+                    client = _client
+                    break
+                expired.append(_client)
+
+        # close out of lock
+        for _client in expired:
+            self.close(_client)
+
+        return client or factory()
+
+    def release(self, key, client):
+        """ Return the client to the pool to reuse it. """
+
+        with self.lock:
+            self.idle.setdefault(key, []).append(
+                [client, time.monotonic() + self.ttl]
+            )
+
+    def discard(self, credential: int = None):
+        """ Close idle clients of a credential (primary key) or all. """
+
+        with self.lock:
+            keys = [
+                key for key in self.idle \
+                    if credential is None or key[1].pk == credential
+            ]
+            clients = [c for key in keys for c, _ in self.idle.pop(key)]
+
+        for client in clients:
+            self.close(client)
+
+    @contextmanager
+    def connection(self, connector, **kwargs):
+        """
+        Context manager with an open client of the connector.
+
+        @@ Parameters
+        @connector (Client):
+            Any connector of utils.connectors with open_connection method.
+        @**kwargs:
+            Extra parameters to pass to connector.open_connection.
+        """
+
+        # same connector type, credential params and extra parameters
+        key = (
+            connector.__class__.__module__,
+            connector.source.get_params(),
+            repr(sorted(kwargs.items()))
+        )
+        client = self.acquire(
+            key,
+            lambda: connector.open_connection(**kwargs)
+        )
+
+        try:
+            yield client
+
+        except OSError:
+            # connection errors, client can't be reused
+            self.close(client)
+            raise
+
+        except Exception:
+            self.release(key, client)
+            raise
+
+        except BaseException:
+            # abandoned generators (GeneratorExit) or interruptions, the
+            # client could be in the middle of a request
+            self.close(client)
+            raise
+
+        else:
+            self.release(key, client)
+
+
+# process-wide pool shared by all connectors and syncs
+pool = ConnectionPool(ttl=getattr(settings, 'CONNECTIONS_TTL', 300))
+
+# disconnect idle clients (logout) when the process ends
+atexit.register(pool.discard)
@@ -9,6 +9,8 @@ from math import ceil
 
 ### own ###
 from utils import api
+from utils import concurrency
+from utils import connections
 
 ### third ###
 from spec_utils import certronic
@@ -29,9 +31,9 @@ class Client:
         self.last_run = last_run
 
         # connection params
-        params = source.credentialparameter_set.all()
-        self.url = params.filter(key='host').first().value
-        self.apikey = params.filter(key='apikey').first().value
+        params = source.get_params()
+        self.url = params.host
+        self.apikey = params.apikey
 
         self.extra_parameters = kwargs
 
@@ -45,8 +47,13 @@ class Client:
             **kwargs
         )
 
+    def connection(self, **kwargs):
+        """ Get an open client from the connections pool. """
+
+        return connections.pool.connection(self, **kwargs)
+
     def get_employees(self, fields: list, _from: str = None, \
-            all_pages: bool = False, **kwargs):
+            all_pages: bool = False, max_workers: int = 1, **kwargs):
         """
         Get employees from Certronic API module with recived parameters.
 
@@ -59,6 +66,9 @@ class Client:
         @all_pages (bool):
             Optional to get all pages with _from and _to context.
             False by default
+        @max_workers (int):
+            Max number of pages requested in parallel with all_pages.
+            1 (sequential) by default.
         @**kwargs (*dict):
             Extra parameters to pass to method certronic.get_employees.
 
@@ -66,15 +76,56 @@ class Client:
         @list: List of employees
         """
 
+        return list(self.iter_employees(
+            fields=fields,
+            _from=_from,
+            all_pages=all_pages,
+            max_workers=max_workers,
+            **kwargs
+        ))
+
+    def iter_employees(self, fields: list, _from: str = None, \
+            all_pages: bool = False, max_workers: int = 1, **kwargs):
+        """
+        Same as get_employees, but yields the employees page by page instead
+        of loading all pages in memory.
+
+        @@ Returns
+        @generator: Generator of employees
+        """
+
         # get last run and current datetime
         date_start = self.last_run
-        # print(date_start)
-        
+
         # with recived values
         if _from:
             date_start = dt.datetime.strptime(_from, "%Y%m%d%H%M%S")
-        
-        with self.open_connection() as client:
+
+        pages = self.iter_employees_pages(
+            date_start=date_start,
+            all_pages=all_pages,
+            max_workers=max_workers,
+            **kwargs
+        )
+
+        # apply field def or default structure if not fields recived
+        if fields:
+            plan = api.FieldsPlan.from_json(fields)
+            for page in pages:
+                yield from plan.iter_apply(page)
+        else:
+            for page in pages:
+                yield from page
+
+    def iter_employees_pages(self, date_start: dt.datetime, \
+            all_pages: bool = False, max_workers: int = 1, **kwargs):
+        """
+        Yields the employees list of each Certronic API page, in order.
+        Pages after the first one are requested with max_workers parallel
+        requests.
+        """
+
+        with self.connection() as client:
             
             # get from SM API
             ct_response = client.get_employees(
@@ -83,34 +134,32 @@ class Client:
             )
             
             # prevent empty responses
-            if ct_response:
-                # get total pages
-                _count = ct_response.get('count', 0)
-                _pageSize = int(ct_response.get('pageSize', '1'))
-                
-                # calculate pages number
-                _pages = ceil(_count / _pageSize) if _count else 1
-
-                # aletrnative
-                if all_pages and _pages > 1:
-                    for i in range(2, _pages +1):
-                        ct_response["employees"].extend(
-                            client.get_employees(
-                                updatedFrom=date_start,
-                                page=i,
-                                **kwargs
-                            ).get('employees')
-                        )
-
-        # apply field def
-        if fields:
-            return api.apply_fields_def(
-                structure=ct_response.get('employees', []),
-                fields_def=[api.FieldDefinition.from_json(f) for f in fields]
-            )
+            if not ct_response:
+                return
+
+            yield ct_response.get('employees', [])
 
-        # default structure if not fields recived
-        return ct_response.get('employees', [])
+            # get total pages
+            _count = ct_response.get('count', 0)
+            _pageSize = int(ct_response.get('pageSize', '1'))
+            
+            # calculate pages number
+            _pages = ceil(_count / _pageSize) if _count else 1
+
+            def get_page(page):
+                return client.get_employees(
+                    updatedFrom=date_start,
+                    page=page,
+                    **kwargs
+                ).get('employees')
+
+            # aletrnative
+            if all_pages and _pages > 1:
+                yield from concurrency.ordered_imap(
+                    get_page,
+                    range(2, _pages +1),
+                    workers=max_workers
+                )
 
     def post_clockings(self, clockings: list, fields: list = [], **kwargs):
         """
@@ -132,13 +181,13 @@ class Client:
 
         # updating structure with fields
         if fields:
-            clockings = api.apply_fields_def(
+            clockings = api.apply_fields_plan(
                 structure=clockings,
-                fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+                fields=fields
             )
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
 
             # send data to module
             result = client.post_clockings(clockings=clockings, **kwargs)
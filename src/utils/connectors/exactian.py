@@ -7,6 +7,8 @@ import datetime as dt
 # ...
 
 ### own ###
+from utils import api
+from utils import connections
 from utils import processors as procs
 
 ### third ###
@@ -30,10 +32,10 @@ class Client:
         self.last_run = last_run
 
         # connection params
-        params = source.credentialparameter_set.all()
-        self.url = params.filter(key='host').first().value
-        self.username = params.filter(key='user').first().value
-        self.pwd = params.filter(key='password').first().value
+        params = source.get_params()
+        self.url = params.host
+        self.username = params.user
+        self.pwd = params.password
 
         self.extra_parameters = kwargs
 
@@ -48,6 +50,11 @@ class Client:
             **kwargs
         )
 
+    def connection(self, **kwargs):
+        """ Get an open client from the connections pool. """
+
+        return connections.pool.connection(self, **kwargs)
+
     def get_employees(self, fields: list, **kwargs) -> list:
         """
         Get employees from exactian with spec_utils.exactian module.
@@ -61,12 +68,12 @@ class Client:
             "fields" parameter.
         """
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
             # get exactian structure
             employees = client.get_emnployees()
 
-        return api.apply_fields_def(
+        return api.apply_fields_columnar(
             structure=employees,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
@@ -1,12 +1,16 @@
 ### built-in ###
 from dateutil.parser import parse
 import datetime as dt
+import threading
 
 ### own ###
 from utils import api
+from utils import concurrency
+from utils import connections
 
 ### third ###
 from spec_utils import nettime6 as nt6
+import pandas as pd
 
 
 class Client:
@@ -24,13 +28,16 @@ class Client:
         self.last_run = last_run
 
         # connection params
-        params = source.credentialparameter_set.all()
-        self.url = params.filter(key='host').first().value
-        self.username = params.filter(key='user').first().value
-        self.pwd = params.filter(key='password').first().value
+        params = source.get_params()
+        self.url = params.host
+        self.username = params.user
+        self.pwd = params.password
 
         self.extra_parameters = kwargs
 
+        # partial errors of the last call (the rest of the data was returned)
+        self.errors = []
+
     def open_connection(self, **kwargs):
         """ Open and return a NetTime 6 API Client. """
 
@@ -42,6 +49,11 @@ class Client:
             **kwargs
         )
 
+    def connection(self, **kwargs):
+        """ Get an open client from the connections pool. """
+
+        return connections.pool.connection(self, **kwargs)
+
     def get_employees(self, fields: list, _from: str = None, \
             filterExp: str = None) -> list:
         """
@@ -68,8 +80,8 @@ class Client:
         if _from:
             date_start = dt.datetime.strptime(_from, "%Y%m%d%H%M%S")
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
 
             # add expression for ignore old syncs (this.modified >= lastSync)
             query = nt6.Query(
@@ -83,9 +95,9 @@ class Client:
             # get employees
             nt_response = client.get_employees(query=query)
 
-        return api.apply_fields_def(
+        return api.apply_fields_columnar(
             structure=nt_response.get('items', []),
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
 
     def get_result_syncs(self, results: list = [], \
@@ -93,7 +105,8 @@ class Client:
             named_totals: bool = True, to_dict: bool = True, \
             dict_type: str = 'dict' , transpose: bool = True, \
             sync_container: str = 'Custom', sync_fields: list = [], \
-            sync_filterExp: str = '', from_view: bool = False, **kwargs):
+            sync_filterExp: str = '', from_view: bool = False, \
+            max_workers: int = 1, **kwargs):
         """
         Get cube results with Custom config from nettime with 
         spec_utils.nettime6 module.
@@ -122,7 +135,8 @@ class Client:
         @to_dict (bool) = True:
             Use to transform pandas DataFrame to dict.
         @dict_type (str) = 'dict':
-            Param to pass to DataFrame.to_dict().
+            Param to pass to DataFrame.to_dict(). The orientations of
+            api.FRAME_ORIENTS are built without pandas.
         @sync_container (str) = 'Custom':
             Name of container with data.
         @sync_fields (list):
@@ -142,6 +156,12 @@ class Client:
             Use this to not configure the results fields and employee_fields, 
             but you need to set a view in nettime custom sync.
             ** IMPORTANT: The view must be created in NetTime v6.
+        @max_workers (int):
+            Max number of syncs processed in parallel. 1 by default.
+            If a sync fails, the others are returned and marked as
+            synchronized, and it remains pending for the next call. The
+            failures are informed in self.errors.
+            Raises concurrency.BatchError if all syncs fail.
         @**kwargs (*dict):
             Extra parameters to pass to method get_cube_results.
         
@@ -199,9 +219,6 @@ class Client:
             # return all filters
             return out_filters
 
-        # list of all elements to return
-        all_elements = []
-
         ### prepare to the nettime syncs that need to run.
         # filter expression
         if not sync_filterExp:
@@ -227,130 +244,195 @@ class Client:
         # query prepare
         query = nt6.Query(fields=sync_fields, filterExp=sync_filterExp)
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # field view definitions, shared by the syncs of this call
+        views = {}
+        views_locks = {}
+        views_lock = threading.Lock()
 
-            # get need syncs
-            need_syncs = client.get_elements(
-                container=sync_container,
-                query=query
-            )
-
-            ### no syncs to run
-            if not need_syncs.get('total'):
-                return {}
+        def get_view(client, name):
+            """ Get a FieldView definition once per call. """
 
-            # syncs to run exist
-            for sync in need_syncs.get('items'):
-                
-                # query prepare
-                params = {}
-                params.update({
-                    "dateIni": parse(sync.get('nsDateFrom')).date().isoformat(),
-                    "dateEnd": parse(sync.get('nsDateTo')).date().isoformat(),
-                })
+            # one lock per view, parallel syncs wait for the first request
+            with views_lock:
+                lock = views_locks.setdefault(name, threading.Lock())
 
-                # if filter was selected
-                if "nsFilter" in sync.keys():
-                    params["filters"] = [{
-                        "id": sync.get('nsFilter'),
-                        "op": "AND"
-                    }]
-
-                # dims prepare
-                dims = {
-                    "_emp_fields": employee_fields,
-                    "_results_fields": results
-                }
-
-                # get dimensions from view or params
-                if from_view:
-                    # get field_view definition
-                    view = client.get_element_def(
+            with lock:
+                if name not in views:
+                    views[name] = client.get_element_def(
                         container="FieldView",
-                        elements=[sync.get('nsFieldView')]
+                        elements=[name]
                     )
 
-                    # update filters
-                    params["filters"] = get_filters(view=view[0])
+                return views[name]
+
+        def get_sync_results(sync):
+            """ Get and process the cube results of a nettime sync. """
+
+            # pooled api connection (one for each parallel sync)
+            with self.connection() as client:
+                return process_sync(client, sync)
 
-                    # get dimensions
-                    _nt_dims = get_dimensions(view=view[0])
+        def process_sync(client, sync):
+            """ Get cube results of a sync with an open client. """
 
-                    # update if can get values
-                    dims = _nt_dims if _nt_dims else dims
+            # query prepare
+            params = {}
+            params.update({
+                "dateIni": parse(sync.get('nsDateFrom')).date().isoformat(),
+                "dateEnd": parse(sync.get('nsDateTo')).date().isoformat(),
+            })
+
+            # if filter was selected
+            if "nsFilter" in sync.keys():
+                params["filters"] = [{
+                    "id": sync.get('nsFilter'),
+                    "op": "AND"
+                }]
+
+            # dims prepare
+            dims = {
+                "_emp_fields": employee_fields,
+                "_results_fields": results
+            }
+
+            # get dimensions from view or params
+            if from_view:
+                # get field_view definition
+                view = get_view(client, sync.get('nsFieldView'))
+
+                # update filters
+                params["filters"] = get_filters(view=view[0])
+
+                # get dimensions
+                _nt_dims = get_dimensions(view=view[0])
+
+                # update if can get values
+                dims = _nt_dims if _nt_dims else dims
+
+            # update vars with params or view values
+            _ef = employee_fields or dims.get('_emp_fields')
+            _rf = results or dims.get('_results_fields')
+            
+            # update params
+            params["dimensions"] = [_ef, _rf]
 
-                # update vars with params or view values
-                _ef = employee_fields or dims.get('_emp_fields')
-                _rf = results or dims.get('_results_fields')
+            # only if per_day is specified
+            if per_day:
+                params.get("dimensions").append(["date"])
+
+            # get results
+            cube_results = client.get_cube_results(**params, **kwargs)
+
+            # out data
+            out_data = []
+
+            # process nettime response
+            for result in cube_results:
+                # initial structure
+                structure = {"employee": {}}
                 
-                # update params
-                params["dimensions"] = [_ef, _rf]
-
-                # only if per_day is specified
-                if per_day:
-                    params.get("dimensions").append(["date"])
-
-                # get results
-                cube_results = client.get_cube_results(**params, **kwargs)
-
-                # out data
-                out_data = []
-
-                # process nettime response
-                for result in cube_results:
-                    # initial structure
-                    structure = {"employee": {}}
-                    
-                    # to size reduce
-                    if named_totals:
-                        structure["totals"] = dict(zip(
-                            _rf,
-                            result.get("values")
-                        ))
+                # to size reduce
+                if named_totals:
+                    structure["totals"] = dict(zip(
+                        _rf,
+                        result.get("values")
+                    ))
+                else:
+                    structure["totals"] = result.get("values")
+                
+                # update person fields
+                for i in range(len(_ef)):
+                    structure.get("employee").update({
+                        _ef[i]: result.get("dimKey")[i]
+                    })
+
+                # if results per date -or month-
+                if 'children' in result.keys():
+                    values = [
+                        c.get("values") for c in result.get("children")
+                    ]
+                    index = [
+                        c.get("dimKey")[0] for c in result.get("children")
+                    ]
+
+                    # same structure of DataFrame.to_dict without pandas
+                    if to_dict and dict_type in api.FRAME_ORIENTS:
+                        structure["frame"] = api.frame_to_dict(
+                            values,
+                            columns=_rf,
+                            index=index,
+                            orient=dict_type,
+                            transpose=transpose
+                        )
+
                     else:
-                        structure["totals"] = result.get("values")
-                    
-                    # update person fields
-                    for i in range(len(_ef)):
-                        structure.get("employee").update({
-                            _ef[i]: result.get("dimKey")[i]
-                        })
-
-                    # if results per date -or month-
-                    if 'children' in result.keys():
                         structure["frame"] = pd.DataFrame(
-                            [c.get("values") for c in result.get("children")],
+                            values,
                             columns=_rf,
-                            index=[c.get("dimKey")[0] \
-                                for c in result.get("children")]
+                            index=index
                         )
                         # swap rows and columns
                         if transpose:
                             structure["frame"] = structure.get("frame").T
-                            
+
                         # convert dataframe to dict
                         if to_dict:
                             structure["frame"] = structure.get(
                                 "frame").to_dict(dict_type)
 
-                    # append structure
-                    out_data.append(structure)
-
-                # append data to output list
-                all_elements.append({
-                    "sync_id": sync.get("id"),
-                    "sync_name": sync.get("name"),
-                    "sync_type": sync.get("type"),
-                    "from": params.get("dateIni"),
-                    "to": params.get("dateEnd"),
-                    "data": out_data
-                })
+                # append structure
+                out_data.append(structure)
+
+            # output structure
+            return {
+                "sync_id": sync.get("id"),
+                "sync_name": sync.get("name"),
+                "sync_type": sync.get("type"),
+                "from": params.get("dateIni"),
+                "to": params.get("dateEnd"),
+                "data": out_data
+            }
+
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
+
+            # get need syncs
+            need_syncs = client.get_elements(
+                container=sync_container,
+                query=query
+            )
+
+            ### no syncs to run
+            if not need_syncs.get('total'):
+                return {}
+
+        # syncs to run exist, process them in parallel
+        syncs = need_syncs.get('items')
+        processed, errors = concurrency.collect_errors(
+            get_sync_results,
+            syncs,
+            workers=max_workers
+        )
+
+        # failed syncs are not marked, they will be processed again
+        all_elements = [p for p in processed if p is not None]
+        if not all_elements:
+            raise concurrency.BatchError(errors=errors, total=len(syncs))
+
+        # inform failed syncs with the returned data
+        self.errors = [
+            concurrency.BatchError(errors=errors, total=len(syncs)).summary()
+        ] if errors else []
+
+        # update synchronized property of processed syncs
+        with self.connection() as client:
+            for sync, result in zip(syncs, processed):
+                if result is None:
+                    continue
 
-                # update synchronized property
                 sync["nsSynchronized"] = True
                 response = client.save_element(
-                    container="Custom",
+                    container=sync_container,
                     elements=[sync.get('id')],
                     dataObj=sync
                 )
@@ -358,7 +440,9 @@ class Client:
         # return all structures
         return all_elements
 
-    def post_employees(self, employees: list, fields: list, **kwargs):
+    def post_employees(self, employees: list, fields: list, \
+            chunk_size: int = 100, max_workers: int = 1, \
+            rate_limit: float = None, **kwargs):
         """
         Send employees to nettime with spec_utils.nettime6 module.
         
@@ -367,28 +451,150 @@ class Client:
             List of dict to send to nettime.
         @fields (list):
             List of api.FieldDefinition to apply in employees* structure.
+        @chunk_size (int):
+            Number of employees processed in each batch. 100 by default.
+        @max_workers (int):
+            Max number of parallel imports (in-flight requests) using the
+            same nettime session. 1 (sequential) by default.
+        @rate_limit (float):
+            Max number of imports per second. None (no limit) by default.
 
         @@ Returns
         @bool: True if no error occurred in the nettime api.
+        Raises concurrency.BatchError with the failed employees, after
+        trying to import all of them.
         """
 
         # updating structure with field_def
-        employees = api.apply_fields_def(
+        employees = api.apply_fields_plan(
             structure=employees,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
-            # import employees one by one
-            for employee in employees:
-                response = client.import_employee(structure=employee)
+        # failed employees
+        errors = []
+
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
+
+            def import_(employee):
+                return client.import_employee(structure=employee)
+
+            # import employees in chunks of concurrent requests
+            for chunk in api.chunked(employees, chunk_size):
+                results, chunk_errors = concurrency.collect_errors(
+                    import_,
+                    chunk,
+                    workers=max_workers,
+                    rate_limit=rate_limit
+                )
+                errors.extend(chunk_errors)
+
+        # inform failed employees
+        if errors:
+            raise concurrency.BatchError(errors=errors, total=len(employees))
 
         # return true for general propose
         return True
 
+    def get_employees_index(self, client, nifs: list, \
+            fields: list = ["id", "nif"], batch_size: int = 100) -> dict:
+        """
+        Get employees by nif with one query per batch of nifs.
+
+        @@ Parameters
+        @client (nt6.Client):
+            Open nettime client.
+        @nifs (list):
+            List of nifs to search.
+        @fields (list):
+            Fields to get from employees. Must include 'nif'.
+        @batch_size (int):
+            Max nifs in each query. 100 by default.
+
+        @@ Returns
+        @dict: Dict with str(nif) keys and list of employees values.
+        """
+
+        index = {}
+
+        # unique and not null nifs
+        nifs = list(dict.fromkeys(str(nif) for nif in nifs if nif))
+
+        for batch in api.chunked(nifs, batch_size):
+            query = nt6.Query(
+                fields=fields,
+                filterExp=' || '.join(f'this.nif = "{nif}"' for nif in batch)
+            )
+            results = client.get_employees(
+                query=query,
+                pageSize=len(batch) * 2
+            )
+
+            for employee in results.get('items', []):
+                index.setdefault(str(employee.get('nif')), []).append(employee)
+
+        return index
+
+    def get_department_node(self, client, node_path: list, nodes: dict, \
+            lock: threading.Lock = None):
+        """
+        Get the id of the last node of node_path, creating the missing nodes.
+        Resolved paths are saved in nodes* dict to reuse them.
+
+        @@ Parameters
+        @client (nt6.Client):
+            Open nettime client.
+        @node_path (list):
+            List of str with names of nodes, from root to last node.
+        @nodes (dict):
+            Dict with tuple(path): id of already resolved nodes.
+        @lock (threading.Lock):
+            Optional lock to avoid duplicated nodes creation between threads.
+
+        @@ Returns
+        @int: Id of last node or None if node_path is empty.
+        """
+
+        lock = lock or threading.Lock()
+        parent = -1
+
+        with lock:
+            for i in range(len(node_path)):
+                key = tuple(node_path[:i + 1])
+
+                if key not in nodes:
+                    # get elements by name
+                    query = nt6.Query(
+                        fields=["id", "name", "idNodeParent"],
+                        filterExp=f"this.name = '{node_path[i]}'"
+                    )
+                    departs = client.get_elements(container="Arbol", \
+                        query=query)
+
+                    # filter elements of parent node
+                    search = [
+                        d for d in departs.get('items') \
+                            if d['idNodeParent'] == parent
+                    ]
+
+                    # create node
+                    if not search:
+                        new_node = client.create_department_node(
+                            name=node_path[i],
+                            parent=parent
+                        )
+                        search = [new_node[0].get('dataObject')]
+
+                    nodes[key] = search[0].get('id')
+
+                parent = nodes[key]
+
+        return parent if node_path else None
+
     def post_departments(self, structure: list, fields: list, \
-            levels: list = [], reverse: bool = False):
+            levels: list = [], reverse: bool = False, batch_size: int = 100, \
+            max_workers: int = 1, skip_unchanged: bool = True):
         """
         Send structure to nettime with spec_utils.nettime6 module.
         
@@ -401,42 +607,84 @@ class Client:
             List of str levels to create structure*. Empty by default.
         @reverse (bool):
             Use if path is in reverse order. False by default.
+        @batch_size (int):
+            Max nifs in each employees query. 100 by default.
+        @max_workers (int):
+            Max number of parallel department assignments. 1 by default.
+        @skip_unchanged (bool):
+            Don't assign the department if the employee already has it.
+            True by default.
 
         @@ Returns
         @bool: True if no error occurred in the nettime api.
+        Raises concurrency.BatchError with the failed elements, after
+        trying to assign all of them.
         """
 
         # updating structure with field_def
-        structure = api.apply_fields_def(
+        structure = api.apply_fields_plan(
             structure=structure,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
 
-            for element in structure:
-                # search employee by nif
-                query = nt6.Query(
-                    fields=["id", "nif"],
-                    filterExp=f'this.nif = "{element.get("nif")}"',
-                )
-                results = client.get_employees(query=query)
+            # search all employees by nif
+            employees = self.get_employees_index(
+                client=client,
+                nifs=[element.get('nif') for element in structure],
+                fields=["id", "nif", "Departments"] if skip_unchanged \
+                    else ["id", "nif"],
+                batch_size=batch_size
+            )
+
+            # resolved department nodes
+            nodes = {}
+            lock = threading.Lock()
+
+            def assign(element):
+                results = employees.get(str(element.get('nif')), [])
+
+                # update employee only if is unique
+                if len(results) != 1:
+                    return
 
                 # set path to department
                 if levels:
                     path = [element.get(level) for level in levels]
                 else:
                     path = element.get('path')
+                path = path[::-1 if reverse else 1]
+
+                node = self.get_department_node(client, path, nodes, lock)
+                department = [{'id': node}] if path else []
+
+                # ignore if department didn't change
+                if skip_unchanged:
+                    current = [
+                        d.get('id') if isinstance(d, dict) else d \
+                            for d in results[0].get('Departments') or []
+                    ]
+                    if current == [d.get('id') for d in department]:
+                        return
+
+                return client.save_element(
+                    container="Persona",
+                    elements=[results[0].get('id')],
+                    dataObj={"Departments": department}
+                )
 
-                # update employee
-                if results.get('total') == 1:
-                    # assign with summary method
-                    response = client.set_employee_department(
-                        employee=results.get('items')[0].get('id'),
-                        node_path=path[::-1 if reverse else 1]
-                    )
+            # assign departments
+            results, errors = concurrency.collect_errors(
+                assign,
+                structure,
+                workers=max_workers
+            )
+
+        # inform failed elements
+        if errors:
+            raise concurrency.BatchError(errors=errors, total=len(structure))
 
         # return true for general propose
         return True
-
@@ -8,6 +8,8 @@ import datetime as dt
 
 ### own ###
 from utils import api
+from utils import concurrency
+from utils import connections
 
 ### third ###
 from spec_utils import specmanagerapi as smapi
@@ -28,9 +30,9 @@ class Client:
         self.last_run = last_run
 
         # connection params
-        params = source.credentialparameter_set.all()
-        self.url = params.filter(key='host').first().value
-        self.apikey = params.filter(key='apikey').first().value
+        params = source.get_params()
+        self.url = params.host
+        self.apikey = params.apikey
 
         self.extra_parameters = kwargs
 
@@ -44,8 +46,14 @@ class Client:
             **kwargs
         )
 
+    def connection(self, **kwargs):
+        """ Get an open client from the connections pool. """
+
+        return connections.pool.connection(self, **kwargs)
+
     def get_clockings(self, _type: str, fields: list, _from: str = None, \
-            _to: str = None, all_pages: bool = False, **kwargs):
+            _to: str = None, all_pages: bool = False, max_workers: int = 1, \
+            **kwargs):
         """
         Get clockings from SPEC Manager API module with recived parameters.
 
@@ -63,6 +71,9 @@ class Client:
         @all_pages (bool):
             Optional to get all pages with _from and _to context.
             False by default
+        @max_workers (int):
+            Max number of pages requested in parallel with all_pages.
+            1 (sequential) by default.
         @**kwargs (*dict):
             Extra parameters to pass to method get_clockings.
 
@@ -70,6 +81,27 @@ class Client:
         @list: List of clockings
         """
 
+        return list(self.iter_clockings(
+            _type=_type,
+            fields=fields,
+            _from=_from,
+            _to=_to,
+            all_pages=all_pages,
+            max_workers=max_workers,
+            **kwargs
+        ))
+
+    def iter_clockings(self, _type: str, fields: list, _from: str = None, \
+            _to: str = None, all_pages: bool = False, max_workers: int = 1, \
+            **kwargs):
+        """
+        Same as get_clockings, but yields the clockings page by page instead
+        of loading all pages in memory.
+
+        @@ Returns
+        @generator: Generator of clockings
+        """
+
         # get last run and current datetime
         date_start = self.last_run
         date_stop = dt.datetime.now()
@@ -79,8 +111,35 @@ class Client:
             date_start = dt.datetime.strptime(_from, "%Y%m%d%H%M%S")
         if _to:
             date_stop = dt.datetime.strptime(_to, "%Y%m%d%H%M%S")
-        
-        with self.open_connection() as client:
+
+        pages = self.iter_clockings_pages(
+            _type=_type,
+            date_start=date_start,
+            date_stop=date_stop,
+            all_pages=all_pages,
+            max_workers=max_workers,
+            **kwargs
+        )
+
+        # apply field def or default return
+        if fields:
+            plan = api.FieldsPlan.from_json(fields)
+            for page in pages:
+                yield from plan.iter_apply(page)
+        else:
+            for page in pages:
+                yield from page
+
+    def iter_clockings_pages(self, _type: str, date_start: dt.datetime, \
+            date_stop: dt.datetime, all_pages: bool = False, \
+            max_workers: int = 1, **kwargs):
+        """
+        Yields the clockings list of each SPEC Manager API page, in order.
+        Pages after the first one are requested with max_workers parallel
+        requests.
+        """
+
+        with self.connection() as client:
             
             # get from SM API
             sm_response = client.get_clockings(
@@ -89,31 +148,27 @@ class Client:
                 _to=date_stop,
                 **kwargs
             )
+            yield sm_response.get('response', {}).get('clockings', [])
+
             # get total pages
             _pages = sm_response.get('response', {}).get('pages', 1)
 
+            def get_page(page):
+                return client.get_clockings(
+                    _type=_type,
+                    _from=date_start,
+                    _to=date_stop,
+                    page=page,
+                    **kwargs
+                ).get('response').get('clockings')
+
             # aletrnative
             if all_pages and _pages > 1:
-                for i in range(2, _pages +1):
-                    sm_response["response"]["clockings"].extend(
-                        client.get_clockings(
-                            _type=_type,
-                            _from=date_start,
-                            _to=date_stop,
-                            page=i,
-                            **kwargs
-                        ).get('response').get('clockings')
-                    )
-
-        # apply field def or default return
-        if fields:
-            return api.apply_fields_def(
-                structure=sm_response.get('response', {}).get('clockings', []),
-                fields_def=[api.FieldDefinition.from_json(f) for f in fields]
-            )
-
-        # default
-        return sm_response.get('response', {}).get('clockings', [])
+                yield from concurrency.ordered_imap(
+                    get_page,
+                    range(2, _pages +1),
+                    workers=max_workers
+                )
 
     def post_employees(self, employees: list, fields: list = [], **kwargs):
         """
@@ -135,15 +190,15 @@ class Client:
 
         # updating structure with fields
         if fields:
-            employees = api.apply_fields_def(
+            employees = api.apply_fields_plan(
                 structure=employees,
-                fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+                fields=fields
             )
 
         # print(employees)
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
 
             # send data to module
             result = client.post_employees(
@@ -2,16 +2,23 @@
 
 ### built-in ###
 import datetime as dt
+import warnings
 
 ### django ###
 # ...
 
 ### own ###
-# ...
+from utils import api
+from utils import connections
 
 ### third ###
 from spec_utils import specmanagerdb as smdb
 import pandas as pd
+import sqlalchemy
+
+
+# rows fetched from the database cursor in each batch (streaming reads)
+FETCH_SIZE = 1000
 
 class Client:
 
@@ -28,15 +35,18 @@ class Client:
         self.last_run = last_run
 
         # connection params
-        params = source.credentialparameter_set.all()
-        self.server = params.filter(key='server').first().value
-        self.username = params.filter(key='user').first().value
-        self.pwd = params.filter(key='password').first().value
-        self.database = params.filter(key='database').first().value
-        self.controller = params.filter(key='controller').first().value
+        params = source.get_params()
+        self.server = params.server
+        self.username = params.user
+        self.pwd = params.password
+        self.database = params.database
+        self.controller = params.controller
 
         self.extra_parameters = kwargs
 
+        # keys of rows read by iter_results, to mark after their delivery
+        self.pending_marks = {}
+
     def open_connection(self, **kwargs):
         """ Open and return a SPECManager DB API Client. """
 
@@ -51,6 +61,59 @@ class Client:
             **kwargs
         )
 
+    def connection(self, **kwargs):
+        """ Get an open client from the connections pool. """
+
+        return connections.pool.connection(self, **kwargs)
+
+    @staticmethod
+    def get_query(table: str, fields: list = ['*'], top: int = 5, \
+            where: str = None, group_by: list = []):
+        """ Return a select statement like smdb.Client.get_from_table. """
+
+        return 'SELECT {}{} FROM {}{}{}'.format(
+            f'TOP {top} ' if top else '',
+            ', '.join(fields),
+            table,
+            f' WHERE {where}' if where else '',
+            f' GROUP BY {", ".join(group_by)}' if group_by else ''
+        )
+
+    def iter_rows(self, query: str, fetch_size: int = FETCH_SIZE):
+        """
+        Execute a query and yield the rows in lists of dict, with at most
+        fetch_size* rows in memory. Uses a server-side cursor if the
+        database driver supports it (stream_results).
+
+        @@ Parameters
+        @query (str):
+            Select statement to execute.
+        @fetch_size (int):
+            Max rows of each batch. FETCH_SIZE by default.
+
+        @@ Returns
+        @generator: Generator of lists of dict with the database values
+            (without pandas conversions, null values are None).
+        """
+
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
+            with client.engine.connect() as connection:
+                result = connection.execution_options(
+                    stream_results=True
+                ).execute(sqlalchemy.text(query))
+
+                keys = list(result.keys())
+                try:
+                    while True:
+                        rows = result.fetchmany(fetch_size)
+                        if not rows:
+                            break
+
+                        yield [dict(zip(keys, row)) for row in rows]
+                finally:
+                    result.close()
+
     def get_employees(self, fields: list = [], **kwargs):
         """
         Get employees from SM with spec_utils.specmanagerdb module.
@@ -68,17 +131,24 @@ class Client:
                 String to determine the condition of the sql statement.
             @group_by (list):
                 List of string to group items. Empty list by default.
+            @fetch_size (int):
+                Read the rows in batches of fetch_size (iter_employees)
+                instead of a pandas structure. None by default.
 
         @@ Returns
         @list: list of elements obtained from nettime and processed with the 
             "fields" parameter.
         """
 
+        # streaming read without pandas structures
+        if kwargs.get('fetch_size'):
+            return list(self.iter_employees(fields=fields, **kwargs))
+
         # get manager fields from fields definition
         sm_fields = [f.get('origin') for f in fields]
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
             sm_employees = client.get_employees(
                 to_records=kwargs.get('to_records', True),
                 fields=sm_fields or ['*'],
@@ -89,17 +159,58 @@ class Client:
             )
 
         # return structure
-        return api.apply_fields_def(
+        return api.apply_fields_columnar(
             structure=sm_employees,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
 
+    def iter_employees(self, fields: list = [], fetch_size: int = None, \
+            **kwargs):
+        """
+        Generator version of get_employees. The rows are read in batches of
+        fetch_size* (FETCH_SIZE by default) and each batch is processed with
+        the "fields" parameter, so memory is bounded by the batch size.
+        Check get_employees for the other parameters.
+
+        @@ Returns
+        @generator: Generator of employees processed with "fields".
+        """
+
+        # get manager fields from fields definition
+        sm_fields = [f.get('origin') for f in fields]
+
+        query = self.get_query(
+            table=kwargs.get('table', "PERSONAS"),
+            fields=sm_fields or ['*'],
+            top=kwargs.get('top', 5),
+            where=kwargs.get('where', None),
+            group_by=kwargs.get('group_by', []),
+        )
+
+        plan = api.FieldsPlan.from_json(fields)
+        for rows in self.iter_rows(query, fetch_size or FETCH_SIZE):
+            yield from plan.iter_apply(rows)
+
     def get_results(self, fields: list, from_table: str, \
             marc_col: str, auto_update: bool = True, **kwargs):
-        """ Get results from custom table in SPEC Manager. """
+        """
+        Get results from custom table in SPEC Manager.
+        With a fetch_size parameter, the rows are read with iter_results
+        (only marked if a key_col is given).
+        """
+
+        # streaming read without pandas structures
+        if kwargs.get('fetch_size'):
+            return list(self.iter_results(
+                fields=fields,
+                from_table=from_table,
+                marc_col=marc_col,
+                auto_update=auto_update,
+                **kwargs
+            ))
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
             results = client.sync_results(
                 from_table=from_table,
                 marc_col=marc_col,
@@ -109,11 +220,91 @@ class Client:
             )
 
         # return structure
-        return api.apply_fields_def(
+        return api.apply_fields_columnar(
             structure=results,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
+        )
+
+    def iter_results(self, fields: list, from_table: str, marc_col: str, \
+            auto_update: bool = True, fetch_size: int = None, \
+            key_col: str = None, **kwargs):
+        """
+        Generator version of get_results, reads the rows in batches of
+        fetch_size* (FETCH_SIZE by default). If auto_update, the keys
+        (key_col*) of the yielded rows are saved, and mark_delivered marks
+        only those rows (marc_col = 1) once the target received them. Rows
+        inserted while reading or beyond the top are not marked. Without a
+        key_col the rows can't be identified, so they aren't marked (a
+        warning is emitted) and will be read again by the next run.
+        """
+
+        if auto_update and not key_col:
+            warnings.warn(
+                f'{from_table}: key_col is required to mark the read rows, '
+                'they will not be marked.',
+                RuntimeWarning
+            )
+            auto_update = False
+
+        query = self.get_query(
+            table=from_table,
+            top=kwargs.get('top', 5),
+            where=f'{marc_col} = 0'
+        )
+
+        keys = self.pending_marks.setdefault(
+            (from_table, marc_col, key_col),
+            []
         )
 
+        plan = api.FieldsPlan.from_json(fields)
+        for rows in self.iter_rows(query, fetch_size or FETCH_SIZE):
+            for row in rows:
+                # saved before yield, the consumer could stop after it
+                if auto_update:
+                    keys.append(row.get(key_col))
+                yield plan.apply_one(row)
+
+    def mark_delivered(self, batch_size: int = FETCH_SIZE):
+        """
+        Mark (marc_col = 1) the rows read by iter_results since the last
+        call. Must be called once the rows were delivered to the target and
+        the reading finished (the update could wait for the open cursor).
+
+        @@ Parameters
+        @batch_size (int):
+            Max keys updated by each statement. FETCH_SIZE by default.
+
+        @@ Returns
+        @int: Number of marked rows.
+        """
+
+        if not any(self.pending_marks.values()):
+            return 0
+
+        marked = 0
+
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
+            with client.engine.begin() as connection:
+                for (table, marc_col, key_col), keys in \
+                        self.pending_marks.items():
+                    statement = sqlalchemy.text(
+                        f'UPDATE {table} SET {marc_col} = 1 '
+                        f'WHERE {key_col} IN :keys'
+                    ).bindparams(sqlalchemy.bindparam('keys', expanding=True))
+
+                    for chunk in api.chunked(keys, batch_size):
+                        marked += connection.execute(
+                            statement,
+                            {"keys": chunk}
+                        ).rowcount
+
+                    # same list, the generator could keep reading
+                    keys.clear()
+
+        return marked
+
     def post_employees(self, employees: list, fields: list, **kwargs):
         """
         Send employees to nettime with spec_utils.smdb module.
@@ -139,13 +330,13 @@ class Client:
         """
 
         # updating structure with field_def
-        employees = api.apply_fields_def(
+        employees = api.apply_fields_plan(
             structure=employees,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
 
-        # open api connection with auto-disconnect
-        with self.open_connection() as client:
+        # pooled api connection (reused between calls)
+        with self.connection() as client:
 
             # convert if is not dataframe
             if not isinstance(employees, pd.DataFrame):
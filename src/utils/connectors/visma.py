@@ -2,15 +2,39 @@
 
 ### built-in ###
 import datetime as dt
+import time
 
 ### django ###
 # ...
 
 ### own ###
-# ...
+from utils import api
+from utils import concurrency
+from utils import connections
 
 ### third ###
 from spec_utils import visma
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+
+# page size used to get all pages of a visma endpoint
+ALL_PAGES_SIZE = 100
+
+
+def not_sent(error: Exception) -> bool:
+    """
+    Return True if a request failed before reaching visma (connection
+    refused, unknown host, connect timeout), so it can be sent again without
+    duplicating data.
+    """
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+
+    reason = error.args[0] if error.args else None
+    return isinstance(reason, MaxRetryError) and \
+        isinstance(reason.reason, NewConnectionError)
 
 
 class Client:
@@ -28,13 +52,16 @@ class Client:
         self.last_run = last_run
 
         # connection params
-        params = source.credentialparameter_set.all()
-        self.url = params.filter(key='host').first().value
-        self.username = params.filter(key='user').first().value
-        self.pwd = params.filter(key='password').first().value
+        params = source.get_params()
+        self.url = params.host
+        self.username = params.user
+        self.pwd = params.password
 
         self.extra_parameters = kwargs
 
+        # latency of sent chunks (concurrency.ChunkStats), saved in history
+        self.stats = None
+
     def open_connection(self, **kwargs):
         """ Open and return a Visma API Client. """
 
@@ -46,10 +73,16 @@ class Client:
             **kwargs
         )
 
+    def connection(self, **kwargs):
+        """ Get an open client from the connections pool. """
+
+        return connections.pool.connection(self, **kwargs)
+
     def get_employees(self, fields: list, active: bool = None, \
             extensions: list = [], pageSize: int = 5, \
             all_pages: bool = False, tenant_filter: dict = None, \
-            updatedFrom: dt.datetime = None, **kwargs):
+            updatedFrom: dt.datetime = None, max_workers: int = 1, \
+            retries: int = 3, backoff: float = 1, **kwargs):
         """
         Get employees from visma with spec_utils.visma module.
         
@@ -63,6 +96,7 @@ class Client:
             with _extension_name.
         @pageSize (int):
             Num of results per page in Visma request. 5 by default.
+            At least ALL_PAGES_SIZE when all_pages is used.
         @all_pages (bool):
             Recursive get page to get all.
         @tenant_filter (dict):
@@ -71,6 +105,13 @@ class Client:
             Datetime to force get employees.
         @tenant_filter (dict):
             Dict to force results from specific tenant. First by default.
+        @max_workers (int):
+            Max number of employees details (and extensions) obtained in
+            parallel. 1 (sequential) by default.
+        @retries (int):
+            Max attempts of each request if visma fails. 3 by default.
+        @backoff (float):
+            Seconds to wait before first retry, doubled on each retry.
 
         @@ Returns
         @list: list of elements obtained from visma and processed with the 
@@ -84,45 +125,62 @@ class Client:
         if updatedFrom:
             date_start = dt.datetime.strptime(updatedFrom, "%Y%m%d%H%M%S")
 
-        # open api connection with auto-disconnect
-        with self.open_connection(tenant_filter=tenant_filter) as client:
+        # less requests to get all pages
+        if all_pages:
+            pageSize = max(pageSize, ALL_PAGES_SIZE)
 
-            # out employees
-            employees_detail = []
+        # pooled api connection (reused between calls)
+        with self.connection(tenant_filter=tenant_filter) as client:
 
-            # no detail
-            response = client.get_employees(
-                active=active,
-                updatedFrom=date_start.strftime("%Y-%m-%d"),
-                pageSize=pageSize,
-                all_pages=all_pages
-            )
+            def get_(**params):
+                return concurrency.retry(
+                    client.get_employees,
+                    attempts=retries,
+                    backoff=backoff,
+                    **params
+                )
 
-            for result in response.get('values'):
+            def get_detail(result):
                 # get employee detail
-                employee = client.get_employees(
-                    employee=f'rh-{result.get("id")}'
-                )
+                employee = get_(employee=f'rh-{result.get("id")}')
+
                 # optional extension/s
                 for extension in extensions:
                     employee.update({
-                        f'_{extension}': client.get_employees(
+                        f'_{extension}': get_(
                             employee=f'rh-{result.get("id")}',
                             extension=extension,
-                            all_pages=True
+                            all_pages=True,
+                            pageSize=ALL_PAGES_SIZE
                         ).get('values', [])
                     })
 
-                # push employee in detail list
-                employees_detail.append(employee)
+                return employee
+
+            # no detail
+            response = get_(
+                active=active,
+                updatedFrom=date_start.strftime("%Y-%m-%d"),
+                pageSize=pageSize,
+                all_pages=all_pages
+            )
+
+            # out employees
+            employees_detail = concurrency.bounded_map(
+                get_detail,
+                response.get('values'),
+                workers=max_workers
+            )
 
-        return api.apply_fields_def(
+        return api.apply_fields_columnar(
             structure=employees_detail,
-            fields_def=[api.FieldDefinition.from_json(f) for f in fields]
+            fields=fields
         )
 
     def post_payments(self, structure: list, sync_cfgs: dict, \
-            tenant_filter: dict = None, **kwargs):
+            tenant_filter: dict = None, chunk_size: int = None, \
+            max_workers: int = 1, retries: int = 3, backoff: float = 1, \
+            **kwargs):
         """
         Send structure with payment values to visma with spec_utils.visma mod.
         
@@ -133,29 +191,105 @@ class Client:
             List of api.FieldDefinition to apply in structure* structure.
         @tenant_filter (dict):
             Dict to force results to specific tenant. First by default.
+        @chunk_size (int):
+            Max number of payments sent in each request. The payments are
+            generated while they are sent. None (single request) by default.
+        @max_workers (int):
+            Max number of chunks sent in parallel. 1 by default.
+        @retries (int):
+            Max number of attempts of each request if it couldn't reach
+            visma. 3 by default.
+        @backoff (float):
+            Seconds to wait before the first retry, doubled on each retry.
+        
+        Payments are inserted, so requests that could have been saved
+        (timeouts, lost responses) are never sent again, their payments are
+        reported as failed. If visma rejects a chunk, its halves are sent
+        again (recursively) to isolate the invalid payments. The latency of
+        each chunk is saved in self.stats.
 
         @@ Returns
         @bool: True if no error occurred in the nettime api.
+        Raises concurrency.BatchError with the failed payments, after trying
+        to send all of them.
         """
 
         # updating structure with field_def
-        elements = api.ntRes_to_vismaPayments(
+        elements = api.iter_ntRes_to_vismaPayments(
             syncs=structure,
             sync_cfgs=sync_cfgs
         )
 
-        # if can't get elements
-        if not elements:
-            return True
+        if chunk_size:
+            chunks = api.chunked(elements, chunk_size)
+        else:
+            # single request
+            elements = list(elements)
+            chunks = [elements]
+
+            # if can't get elements
+            if not elements:
+                return True
+
+        # accumulated between calls (streaming syncs)
+        if self.stats is None:
+            self.stats = concurrency.ChunkStats()
+
+        # failed payments and first chunk of this call
+        errors = []
+        first = len(self.stats.chunks)
 
-        # open temporal visma client
-        with self.open_connection(tenant_filter=tenant_filter) as client:
+        # pooled visma client (reused between calls)
+        with self.connection(tenant_filter=tenant_filter) as client:
+
+            def post(values):
+                # only requests that didn't reach visma
+                return concurrency.retry(
+                    client.post_pay_elements,
+                    values=values,
+                    attempts=retries,
+                    backoff=backoff,
+                    exceptions=(requests.exceptions.ConnectionError,),
+                    when=not_sent,
+                    **kwargs
+                )
+
+            def send(chunk):
+                start = time.monotonic()
+                chunk_errors = []
+                try:
+                    # visma errors (ConnectionError with the api response)
+                    # are isolated, the other errors fail the whole chunk
+                    return concurrency.bisect(
+                        post,
+                        chunk,
+                        chunk_errors,
+                        exceptions=(ConnectionError,),
+                        failures=(requests.exceptions.RequestException,)
+                    )
+                finally:
+                    errors.extend(chunk_errors)
+                    self.stats.add(
+                        size=len(chunk),
+                        seconds=time.monotonic() - start,
+                        failed=len(chunk_errors)
+                    )
 
             # send data
-            result = client.post_pay_elements(values=elements, **kwargs)
+            results = []
+            for chunk_results in concurrency.ordered_imap(
+                    send, chunks, workers=max_workers):
+                results.extend(chunk_results)
+
+        # inform failed payments
+        if errors:
+            raise concurrency.BatchError(
+                errors=errors,
+                total=sum(c.get('size') for c in self.stats.chunks[first:])
+            )
 
         # general propose
-        if not result:
+        if not all(results):
             return False
 
         # general propose
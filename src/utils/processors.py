@@ -7,22 +7,151 @@ import functools
 import operator
 
 ### django ###
-# ...
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
 ### own ###
 from . import tupleware
 
 ### third ###
 from unidecode import unidecode
+import pandas as pd
 
 def set_value(obj: dict, value):
     """ Return a value to set in a like structure. """
     return value
 
+def _parse_date(obj: str, hint: str = None, options: tuple = (), \
+        today: dt.date = None):
+    """
+    Parse a date string. Tries the hint format (strptime) and ISO format
+    before dateutil, which is much slower.
+    "today" is not used to parse, it's part of the cache key because dateutil
+    fills the missing parts of the date (eg. "10:30") with the current date.
+    """
+
+    if hint:
+        try:
+            return dt.datetime.strptime(obj, hint)
+        except ValueError:
+            pass
+
+    # iso dates (yyyy-mm-dd...) without timezone, only with default options
+    if not options and obj[4:5] == '-' and obj[7:8] == '-':
+        try:
+            value = dt.datetime.fromisoformat(obj)
+            if value.tzinfo is None:
+                return value
+        except ValueError:
+            pass
+
+    return parse(obj, **dict(options))
+
+def _get_dates_cache_size() -> int:
+    """ settings.DATES_CACHE_SIZE, or the default out of django. """
+
+    try:
+        return getattr(settings, 'DATES_CACHE_SIZE', 4096)
+    except ImproperlyConfigured:
+        return 4096
+
+# memoized version of _parse_date
+_parse_date_cached = functools.lru_cache(
+    maxsize=_get_dates_cache_size()
+)(_parse_date)
+
+def parse_date(obj: str, hint: str = None, **kwargs) -> dt.datetime:
+    """
+    Memoized dateutil.parser.parse. Feeds repeat the same date strings, so
+    each one is parsed once (while it stays in the cache).
+
+    @@ Parameters
+    @obj (str):
+        String to parse.
+    @hint (str):
+        Optional strptime format to try before the other parsers.
+    @**kwargs:
+        Parameters to pass to the dateutil.parser.parse method.
+
+    @@ Returns
+    @dt.datetime: Parsed datetime.
+    """
+
+    # streams, bytes, etc
+    if not isinstance(obj, str):
+        return parse(obj, **kwargs)
+
+    options = tuple(sorted(kwargs.items()))
+    try:
+        hash(options)
+    except TypeError:
+        # unhashable parameters (tzinfos dict, etc)
+        return _parse_date(obj, hint, options)
+
+    return _parse_date_cached(obj, hint, options, dt.date.today())
+
+def parse_date_info():
+    """ Return hits, misses, maxsize and currsize of the dates cache. """
+
+    return _parse_date_cached.cache_info()
+
+def parse_date_clear():
+    """ Clear the dates cache and its statistics. """
+
+    _parse_date_cached.cache_clear()
+
+def compile_accessor(key: str, default = None):
+    """
+    Build a getter for a rget path ("a.b.c") with the default value bound.
+    The returned function receives only the obj.
+    """
+
+    keys = key.split('.')
+
+    # specialized getters for the usual short paths
+    if len(keys) == 1:
+        first, = keys
+        def _get(obj):
+            return obj.get(first, default)
+
+    elif len(keys) == 2:
+        first, second = keys
+        def _get(obj):
+            return obj.get(first, default).get(second, default)
+
+    elif len(keys) == 3:
+        first, second, third = keys
+        def _get(obj):
+            return obj.get(first, default).get(second, default).get(
+                third, default
+            )
+
+    else:
+        def _get(obj):
+            for _key in keys:
+                obj = obj.get(_key, default)
+            return obj
+
+    return _get
+
+# compiled getters, cached by path and default value
+_cached_accessor = functools.lru_cache(maxsize=1024)(compile_accessor)
+
+def get_accessor(key: str, default = None):
+    """
+    Return the compiled getter of a rget path. Getters are built once per
+    path (and hashable default) and reused by rget, filter_json and join.
+    """
+
+    try:
+        return _cached_accessor(key, default)
+    except TypeError:
+        # unhashable default
+        return compile_accessor(key, default)
+
 def rget(obj: dict, key: str, *args):
     """ Recursive get() with obj.get(key, *args) path. """
-    def _get(obj, key):
-        return obj.get(key, *args)
-    return functools.reduce(_get, [obj] + key.split('.'))
+    return get_accessor(key, *args)(obj)
 
 def rgetattr(obj, attr, *args):
     """ Recursive getattr() with obj.attr path. """
@@ -64,31 +193,55 @@ def filter_json(obj: list, attribute: str, value, operation: str = 'eq',
         KW Elements to pass to the selected operator.
     """
 
+    return list(ifilter_json(
+        obj, attribute, value, operation, negative, exclude, *args, **kwargs
+    ))
+
+
+def get_predicate(attribute: str, value, operation: str = 'eq',
+    negative: bool = False, exclude: bool = False, *args, **kwargs):
+    """
+    Build the filter_json predicate once. Returns a function that receives
+    an element and informs (truthy value) if it must be included in the
+    result.
+    Check filter_json for parameters.
+    """
+
     # method of operator to execute.
     # 'eq' by default
     method = getattr(operator, operation)
+    get = get_accessor(attribute, None)
+
+    # negate and exclude are the same inversion of the operator result
+    invert = bool(negative) != bool(exclude)
+
+    if args or kwargs:
+        def predicate(element):
+            res = method(get(element), value, *args, **kwargs)
+            return bool(res) != invert
+
+    elif invert:
+        def predicate(element):
+            return not method(get(element), value)
+
+    else:
+        def predicate(element):
+            return method(get(element), value)
 
-    # out elements
-    elements = []
+    return predicate
 
-    #for element in objects:
-    for element in obj:
-        # get attr value and execute method of operator
-        res = method(rget(element, attribute, None), value, *args, **kwargs)
-        
-        # negate if recives 'negative' parameter
-        if negative:
-            res = not res
 
-        if res:
-            # if not exclude, append element to out elements
-            elements.append(element) if not exclude else None
-        else:
-            # if operator don't match but must exclude matches,
-            # append element to out elements
-            elements.append(element) if exclude else None
+def ifilter_json(obj, attribute: str, value, operation: str = 'eq',
+    negative: bool = False, exclude: bool = False, *args, **kwargs):
+    """
+    Lazy version of filter_json. Obj can be any iterable (list, generator,
+    etc) and the matching elements are yielded while it is consumed.
+    Check filter_json for parameters.
+    """
 
-    return elements
+    return filter(get_predicate(
+        attribute, value, operation, negative, exclude, *args, **kwargs
+    ), obj)
 
 
 def get_from_dict(obj: dict, key: str):
@@ -179,8 +332,9 @@ def join(obj: list, sep: str = "\n", prefix: str = "", suffix: str = "", \
     _out = ""
 
     if filter_:
-        # filter withb rget
-        _out = sep.join([f'{prefix}{rget(e, filter_)}{suffix}' for e in obj])
+        # filter with compiled rget
+        get = get_accessor(filter_)
+        _out = sep.join([f'{prefix}{get(e)}{suffix}' for e in obj])
     else:
         # use list
         _out = sep.join([f'{prefix}{e}{suffix}' for e in obj])
@@ -202,7 +356,7 @@ def get_gender_acronym(obj: str) -> str:
     return "M"
 
 
-def time_format(obj: str, fmt: str, **kwargs) -> str:
+def time_format(obj: str, fmt: str, in_fmt: str = None, **kwargs) -> str:
     """
     Converts a string to a date and returns it in the format indicated by the 
     fmt* parameter.
@@ -212,6 +366,8 @@ def time_format(obj: str, fmt: str, **kwargs) -> str:
         Compatible string with datetime.strftime behavior.
         More info in:
         https://docs.python.org/3/library/datetime.html#strftime-strptime-behavior
+    @in_fmt (str):
+        Optional format of obj (strptime) to try before the dateutil parser.
     @**kwargs:
         Parameters to format string to date.
         These will be passed to the dateutil.parser.parse method.
@@ -223,7 +379,7 @@ def time_format(obj: str, fmt: str, **kwargs) -> str:
     """
 
     # parse str to datetime object
-    py_dt = parse(obj, **kwargs) if isinstance(obj, str) else obj
+    py_dt = parse_date(obj, in_fmt, **kwargs) if isinstance(obj, str) else obj
 
     # format and return
     return py_dt.strftime(fmt)
@@ -331,7 +487,7 @@ def date_to_ActiveDays(obj, is_active: bool = True):
     """
     _obj = obj
     if _obj.__class__.__name__ not in ["datetime", "date"]:
-        _obj = parse(_obj)
+        _obj = parse_date(_obj)
 
     return {
         "validity": [{
@@ -341,3 +497,118 @@ def date_to_ActiveDays(obj, is_active: bool = True):
             )
         }]
     }
+
+
+# vectorized variants of processors. {processor name: function}
+# each function receives a pandas Series with the truthy values of a column
+# and the same parameters of the processor, and returns a Series (same order)
+# or None if the values can't be processed as a column.
+VECTORIZED = {}
+
+# str methods with an equivalent in pandas Series.str
+SERIES_STR_METHODS = (
+    'lower', 'upper', 'title', 'capitalize', 'swapcase', 'casefold',
+    'strip', 'lstrip', 'rstrip'
+)
+
+def vectorized(name: str):
+    """ Register the decorated function as vectorized variant of "name". """
+
+    def decorator(func):
+        VECTORIZED[name] = func
+        return func
+
+    return decorator
+
+def _all_str(obj: pd.Series) -> bool:
+    """ Inform if all values of the series are str. """
+
+    return all(isinstance(value, str) for value in obj)
+
+def map_unique(obj: pd.Series, func, *args, **kwargs) -> pd.Series:
+    """
+    Apply func once per distinct value of the series and return a series
+    with the results. Values are compared with its type (1 != True) and
+    unhashable values are processed one by one.
+    """
+
+    results = {}
+    out = []
+    for value in obj:
+        try:
+            key = (value.__class__, value)
+            if key not in results:
+                results[key] = func(value, *args, **kwargs)
+            out.append(results[key])
+        except TypeError:
+            # unhashable
+            out.append(func(value, *args, **kwargs))
+
+    return pd.Series(out, index=obj.index, dtype=object)
+
+@vectorized('get_gender_acronym')
+def get_gender_acronym_series(obj: pd.Series):
+    """ Vectorized get_gender_acronym. """
+
+    if not _all_str(obj):
+        return None
+
+    return obj.str.lower().eq("female").map({True: "F", False: "M"})
+
+@vectorized('time_format')
+def time_format_series(obj: pd.Series, fmt: str, in_fmt: str = None, \
+        **kwargs):
+    """ Vectorized time_format, parses and formats each date once. """
+
+    return map_unique(obj, time_format, fmt, in_fmt, **kwargs)
+
+@vectorized('to_datetime')
+def to_datetime_series(obj: pd.Series, fmt: str, **kwargs):
+    """ Vectorized to_datetime with pd.to_datetime and explicit format. """
+
+    # timezones and locale formats are left to strptime
+    if not _all_str(obj) or \
+            any(d in fmt for d in ('%z', '%Z', '%c', '%x', '%X')):
+        return map_unique(obj, to_datetime, fmt, **kwargs)
+
+    try:
+        values = pd.to_datetime(obj, format=fmt, exact=True, errors='raise')
+    except (ValueError, TypeError):
+        # raise the same error of row-wise version
+        return map_unique(obj, to_datetime, fmt, **kwargs)
+
+    return pd.Series(
+        list(values.dt.to_pydatetime()),
+        index=obj.index,
+        dtype=object
+    )
+
+@vectorized('replace')
+def replace_series(obj: pd.Series, old: str, new: str):
+    """ Vectorized replace. """
+
+    if not _all_str(obj):
+        return None
+
+    return obj.str.replace(old, new, regex=False)
+
+@vectorized('to_ascii')
+def to_ascii_series(obj: pd.Series):
+    """ Vectorized to_ascii, converts each distinct word once. """
+
+    return map_unique(obj, to_ascii)
+
+@vectorized('str_method')
+def str_method_series(obj: pd.Series, method: str):
+    """ Vectorized str_method for methods available in Series.str. """
+
+    if method not in SERIES_STR_METHODS or not _all_str(obj):
+        return None
+
+    return getattr(obj.str, method)()
+
+@vectorized('switch')
+def switch_series(obj: pd.Series, cases: dict, default = None):
+    """ Vectorized switch, resolves each distinct value once. """
+
+    return map_unique(obj, switch, cases, default)